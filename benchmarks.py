@@ -0,0 +1,298 @@
+"""
+Benchmarks for hot game code paths, run over synthetic maps of several sizes.
+
+Run with: python benchmarks.py
+          python benchmarks.py --sizes 32x24 256x256 --output results.json
+          python benchmarks.py --baseline results.json --threshold 0.2
+
+Every result is a time in milliseconds (lower is better). With --baseline,
+results more than --threshold slower than the baseline are reported and the
+script exits with status 1, so it can gate changes in CI.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import types
+import numpy as np
+from tile_types import TileTypes, RockTypes, ROCK_TYPE_TABLE
+from map_data import Map
+from items import ItemRegistry
+
+DEFAULT_SIZES = ["32x24", "256x256", "1024x1024", "4096x4096"]
+JSON_MAX_TILES = 1024 * 1024  # JSON maps bigger than this take minutes, so they're skipped
+FRAMES_PER_RUN = 20  # Camera positions drawn per render measurement
+MINED_TILES = 1000  # Tiles changed before each reset measurement
+
+# Old global rock dict keyed by "(x, y)" strings, used by the legacy baseline
+_legacy_rock_data = {}
+
+def _legacy_get_tile_properties(tile_type, position=None):
+    """The old dict-building lookup, kept here as a baseline to compare against"""
+    base_properties = {
+        TileTypes.FLOOR: {'name': 'Floor', 'color': (100, 100, 100), 'walkable': True,
+                          'mineable': False, 'resettable': False},
+        TileTypes.WALL: {'name': 'Wall', 'color': (50, 50, 50), 'walkable': False,
+                         'mineable': True, 'resettable': False, 'has_image': True},
+        TileTypes.ROCK: {'name': 'Rock', 'color': (128, 128, 128), 'walkable': False,
+                         'mineable': True, 'resettable': True},
+        TileTypes.DEPLETED_ROCK: {'name': 'Depleted Rock', 'color': (70, 70, 70), 'walkable': False,
+                                  'mineable': False, 'resettable': True},
+        TileTypes.FURNACE: {'name': 'Furnace', 'color': (200, 60, 20), 'walkable': False,
+                            'mineable': False, 'smeltable': True, 'resettable': False},
+        TileTypes.BED: {'name': 'Bed', 'color': (150, 50, 150), 'walkable': False,
+                        'mineable': False, 'interactable': True, 'resettable': False},
+        TileTypes.ANVIL: {'name': 'Anvil', 'color': (120, 120, 120), 'walkable': False,
+                          'mineable': False, 'resettable': False, 'craftable': True}
+    }
+    properties = base_properties.get(tile_type, base_properties[TileTypes.FLOOR]).copy()
+    if tile_type == TileTypes.ROCK and position:
+        pos_str = str(position)
+        if pos_str in _legacy_rock_data:
+            properties.update(_legacy_rock_data[pos_str])
+    return properties
+
+def _lookups_per_second(lookup, tiles, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for tile, position in tiles:
+            lookup(tile, position)
+    elapsed = time.perf_counter() - start
+    return len(tiles) * repeat / elapsed
+
+def bench_tile_lookup():
+    """Compare tile property lookups per second, old dict API vs property table"""
+    # One of every tile type plus a typed rock, repeated to a viewport-ish workload
+    _legacy_rock_data[str((2, 0))] = RockTypes.COPPER
+    game_map = Map(len(TileTypes.PROPERTIES), 1)
+    game_map.set_rock_type(2, 0, RockTypes.COPPER)
+    tiles = [(tile, (tile, 0)) for tile in range(len(TileTypes.PROPERTIES))] * 200
+
+    results = {
+        'legacy dict': _lookups_per_second(_legacy_get_tile_properties, tiles),
+        'get_tile_properties (shim)': _lookups_per_second(
+            lambda tile, pos: TileTypes.get_tile_properties(tile, pos, game_map), tiles),
+        'get_properties': _lookups_per_second(lambda tile, pos: TileTypes.get_properties(tile), tiles),
+        'get_tile_color': _lookups_per_second(
+            lambda tile, pos: TileTypes.get_tile_color(tile, game_map.rock_type_at(*pos)), tiles),
+    }
+
+    baseline = results['legacy dict']
+    print("Tile property lookups")
+    for name, rate in results.items():
+        print(f"  {name:<28} {rate:>14,.0f} /s  ({rate / baseline:.1f}x)")
+    return results
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def make_map(width, height, seed=0):
+    """
+    A walled map that looks roughly like a real one: mostly floor, with rock
+    clusters of random ore types, a few furnaces, anvils and beds, and items
+    scattered on about one tile in two hundred.
+    """
+    rng = np.random.default_rng(seed)
+    game_map = Map(width, height)
+    game_map.tiles[1:-1, 1:-1] = TileTypes.FLOOR
+
+    noise = rng.random((height, width))
+    rock_mask = (noise < 0.12) & (game_map.tiles == TileTypes.FLOOR)
+    game_map.tiles[rock_mask] = TileTypes.ROCK
+    game_map.rocks[rock_mask] = rng.integers(1, len(ROCK_TYPE_TABLE), int(rock_mask.sum()))
+    for tile, share in ((TileTypes.WALL, 0.04), (TileTypes.FURNACE, 0.001),
+                        (TileTypes.ANVIL, 0.001), (TileTypes.BED, 0.0005)):
+        game_map.tiles[(noise > 1 - share) & (game_map.tiles == TileTypes.FLOOR)] = tile
+
+    # Saved maps store item names, so only use items that load back under the same name
+    item_names = [name for name in ItemRegistry.get_all_items() if ItemRegistry.create_item(name).name == name]
+    floor_ys, floor_xs = np.nonzero(game_map.tiles == TileTypes.FLOOR)
+    chosen = rng.choice(len(floor_xs), max(1, len(floor_xs) // 200), replace=False)
+    for index in chosen.tolist():
+        pos = (int(floor_xs[index]), int(floor_ys[index]))
+        game_map._store_items(pos, ItemRegistry.create_item(item_names[index % len(item_names)]))
+
+    game_map.player_spawn = (int(floor_xs[0]), int(floor_ys[0]))
+    game_map.save_initial_state()
+    return game_map
+
+def best_of(function, repeat):
+    """Fastest of several runs in milliseconds, the least noisy single figure"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_file_formats(game_map, name, repeat):
+    results = {}
+    formats = ['binary']
+    if game_map.width * game_map.height <= JSON_MAX_TILES:
+        formats.append('json')
+    for file_format in formats:
+        results[f"save_{file_format}"] = best_of(lambda: game_map.save_to_file(name, file_format), repeat)
+        results[f"load_{file_format}"] = best_of(lambda: Map.load_from_file(name, file_format), repeat)
+    return results
+
+def bench_lookups(game_map):
+    """Property lookups for every tile in a 64x64 corner of the map"""
+    height, width = min(game_map.height, 64), min(game_map.width, 64)
+    tiles = [(int(game_map.tiles[y, x]), (x, y)) for y in range(height) for x in range(width)]
+    rate = _lookups_per_second(lambda tile, pos: TileTypes.get_tile_properties(tile, pos, game_map), tiles)
+    return {"get_tile_properties": len(tiles) / rate * 1000}
+
+def bench_render(name, repeat):
+    """Average cost of drawing the map and ground items for a frame, scrolling across the map"""
+    from game_window import Game
+    game = Game(frame_cap=0, map_name=name)
+    max_x = max(0, game.current_map.width - game.VIEWPORT_WIDTH)
+    max_y = max(0, game.current_map.height - game.VIEWPORT_HEIGHT)
+    # A diagonal pan across the whole map, and a camera standing still in the middle
+    panning = [(max_x * i // FRAMES_PER_RUN, max_y * i // FRAMES_PER_RUN) for i in range(FRAMES_PER_RUN)]
+    still = [(max_x // 2, max_y // 2)] * FRAMES_PER_RUN
+
+    def draw(method, cameras, cold=False):
+        if cold:
+            game.map_renderer.invalidate_all()
+        for game.camera_x, game.camera_y in cameras:
+            method()
+
+    return {
+        "draw_map_tiles_pan": best_of(lambda: draw(game._draw_map_tiles, panning, True), repeat) / FRAMES_PER_RUN,
+        "draw_map_tiles_still": best_of(lambda: draw(game._draw_map_tiles, still), repeat) / FRAMES_PER_RUN,
+        "draw_ground_items": best_of(lambda: draw(game._draw_ground_items, panning), repeat) / FRAMES_PER_RUN
+    }
+
+def bench_reset(game_map, repeat, seed=0):
+    """GameState.reset_state after mining and picking up items across the map"""
+    from game_state import GameState
+    rng = np.random.default_rng(seed)
+    rock_ys, rock_xs = np.nonzero(game_map.tiles == TileTypes.ROCK)
+    mined = rng.choice(len(rock_xs), min(MINED_TILES, len(rock_xs)), replace=False)
+    item_positions = list(game_map.items)[:MINED_TILES // 10]
+    state = GameState(game_map)
+
+    def mine_and_reset():
+        for index in mined.tolist():
+            game_map.set_tile(int(rock_xs[index]), int(rock_ys[index]), TileTypes.DEPLETED_ROCK)
+        for pos in item_positions:
+            game_map.set_items(pos, None)
+        start = time.perf_counter()
+        state.reset_state()
+        return time.perf_counter() - start
+
+    # Only the reset itself is timed, not the mining that sets it up
+    return {"reset_state": min(mine_and_reset() for _ in range(repeat)) * 1000}
+
+def bench_resize(game_map, repeat):
+    """MapEditor.resize_map growing and shrinking the map by a quarter"""
+    from map_editor import MapEditor
+    editor = types.SimpleNamespace(current_map=game_map, camera_x=0, camera_y=0,
+                                   VIEWPORT_WIDTH=16, VIEWPORT_HEIGHT=12,
+                                   MAP_WIDTH=game_map.width, MAP_HEIGHT=game_map.height)
+    def set_map(new_map):
+        # The real one also resets the undo history and map layer, neither of which depends on size
+        editor.current_map = new_map
+        editor.MAP_WIDTH, editor.MAP_HEIGHT = new_map.width, new_map.height
+    editor.set_map = set_map
+    width, height = game_map.width, game_map.height
+
+    def resize():
+        editor.current_map = game_map
+        MapEditor.resize_map(editor, width + width // 4, height + height // 4)
+        MapEditor.resize_map(editor, width - width // 4, height - height // 4)
+
+    return {"resize_map": best_of(resize, repeat)}
+
+def run_benchmarks(sizes, repeat=3, render=True):
+    """Run every benchmark for each size, returning {"name/size": milliseconds}"""
+    results = {}
+    original_directory = os.getcwd()
+    work_directory = tempfile.mkdtemp(prefix="benchmarks-")
+    try:
+        # Maps are read and written under maps/ relative to the working directory
+        os.makedirs(os.path.join(work_directory, "maps"))
+        assets = os.path.join(original_directory, "assets")
+        if os.path.isdir(assets):
+            shutil.copytree(assets, os.path.join(work_directory, "assets"))
+        os.chdir(work_directory)
+
+        for width, height in sizes:
+            size = f"{width}x{height}"
+            name = f"bench_{size}"
+            print(f"{size}:")
+            game_map = make_map(width, height)  # Maps are generated before anything is timed
+            size_results = {}
+            size_results.update(bench_file_formats(game_map, name, repeat))
+            size_results.update(bench_lookups(game_map))
+            if render:
+                size_results.update(bench_render(name, repeat))
+            size_results.update(bench_reset(game_map, repeat))
+            size_results.update(bench_resize(game_map, repeat))
+            for benchmark, milliseconds in size_results.items():
+                print(f"  {benchmark:<24} {milliseconds:>12.3f} ms")
+                results[f"{benchmark}/{size}"] = milliseconds
+    finally:
+        os.chdir(original_directory)
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return results
+
+def compare(results, baseline, threshold):
+    """Returns the benchmarks that got more than threshold (a fraction) slower"""
+    regressions = []
+    for name, milliseconds in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or previous <= 0:
+            continue
+        change = milliseconds / previous - 1
+        marker = ""
+        if change > threshold:
+            regressions.append((name, previous, milliseconds, change))
+            marker = "  REGRESSION"
+        print(f"  {name:<36} {previous:>12.3f} -> {milliseconds:>12.3f} ms ({change:+.1%}){marker}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark map loading, rendering and editing")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="map sizes as WIDTHxHEIGHT (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the fastest is kept")
+    parser.add_argument("--no-render", action="store_true", help="skip the benchmarks that need pygame")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="fail when a benchmark is this much slower than the baseline (default: %(default)s)")
+    parser.add_argument("--lookups", action="store_true", help="also compare legacy and current tile lookups")
+    args = parser.parse_args()
+
+    if not args.no_render:
+        # Render without opening a window
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if args.lookups:
+        bench_tile_lookup()
+
+    results = run_benchmarks([parse_size(size) for size in args.sizes], args.repeat, not args.no_render)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
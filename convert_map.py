@@ -0,0 +1,27 @@
+"""
+Convert maps between the JSON interchange format and the binary format.
+
+Usage:
+    python convert_map.py test_map            (maps/test_map.json -> maps/test_map.bmap)
+    python convert_map.py test_map --to-json  (maps/test_map.bmap -> maps/test_map.json)
+"""
+import argparse
+from map_data import Map
+
+def convert_map(filename, to_json=False):
+    if to_json:
+        source_format, target_format = 'binary', 'json'
+    else:
+        source_format, target_format = 'json', 'binary'
+    game_map = Map.load_from_file(filename, source_format)
+    game_map.save_to_file(filename, target_format)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert maps between JSON and binary formats")
+    parser.add_argument("maps", nargs="+", help="map names inside the maps/ directory, without extension")
+    parser.add_argument("--to-json", action="store_true", help="convert binary maps back to JSON")
+    args = parser.parse_args()
+    
+    for filename in args.maps:
+        convert_map(filename, args.to_json)
+        print(f"Converted {filename}")
@@ -1,5 +1,6 @@
 import pygame
 from items import ItemRegistry
+from text_cache import TextCache
 
 class CraftingRecipe:
     def __init__(self, name, level, material, bars_required):
@@ -49,7 +50,6 @@ class CraftingMenu:
         self.hovered_recipe = None
         
         # Draw available recipes
-        font = pygame.font.Font(None, 24)
         y_offset = y + padding
         
         for material, recipes in self.recipes.items():
@@ -65,7 +65,7 @@ class CraftingMenu:
                         pygame.draw.rect(screen, (150, 150, 150), recipe.rect)
                     
                     text = f"{recipe.name} (Level {recipe.level}, {recipe.bars_required} bars)"
-                    text_surface = font.render(text, True, (255, 255, 255))
+                    text_surface = TextCache.render(text, 24)
                     screen.blit(text_surface, (x + padding, y_offset))
                     y_offset += 30
 
@@ -82,21 +82,10 @@ class CraftingMenu:
 
     def craft_item(self, recipe, player):
         # Check if player has enough bars
-        bars_found = 0
-        bar_slots = []
         bar_name = f"{recipe.material.title()} Bar"
+        bar_type = f"{recipe.material}_bar"
         
-        for i, item in enumerate(player.inventory.items):
-            if item and item.name == bar_name:
-                bars_found += 1
-                bar_slots.append(i)
-                if bars_found >= recipe.bars_required:
-                    break
-        
-        if bars_found >= recipe.bars_required:
-            # Remove the bars
-            for i in range(recipe.bars_required):
-                player.inventory.items[bar_slots[i]] = None
+        if player.inventory.take(bar_type, recipe.bars_required):
             
             # Create the new item
             new_item = ItemRegistry.create_item(recipe.name.lower().replace(" ", "_"))
@@ -107,8 +96,7 @@ class CraftingMenu:
             else:
                 player.game.add_message("Inventory full! Cannot craft item.")
                 # Return the bars
-                for i in range(recipe.bars_required):
-                    player.inventory.items[bar_slots[i]] = ItemRegistry.create_item(bar_name.lower().replace(" ", "_"))
+                player.inventory.add_item_type(bar_type, recipe.bars_required)
         else:
             player.game.add_message(f"Need {recipe.bars_required} {bar_name}s to craft {recipe.name}")
 
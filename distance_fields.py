@@ -0,0 +1,200 @@
+import heapq
+import numpy as np
+from collections import deque
+from tile_types import TileTypes, ROCK_TYPE_TABLE
+
+class DistanceField:
+    """Walking distance from every tile to the nearest tile next to a target"""
+    def __init__(self, targets, distances, owners):
+        self.targets = targets  # Set of target tile positions
+        self.distances = distances  # Padded flat array, -1 where unreachable
+        self.owners = owners  # Index of the standing tile each distance leads to
+
+class DistanceFields:
+    """
+    Multi-source BFS maps towards every tile of a kind, so "where's the
+    nearest furnace and which way is it" is a couple of array lookups.
+    Targets are tile types (TileTypes.FURNACE, ANVIL, BED) or ore types
+    ("copper", "tin", ...). Targets can't be walked on, so distances lead to
+    the walkable tiles beside them.
+
+    Fields are built on first use and then patched around each small change.
+    Tiles whose shortest route ran through a blocked tile or a target that
+    went away are cleared, then everything around the change (opened tiles,
+    new targets and the edge of the cleared area) is relaxed outwards again
+    nearest first, so only distances that could have changed are touched.
+    """
+    MAX_CHECKED_REGION = 64  # Bigger changes just rebuild every field
+
+    def __init__(self, game_map, grid):
+        self.map = game_map
+        self.grid = grid
+        # Grid is padded with an unwalkable border so neighbour indices never wrap
+        self.stride = game_map.width + 2
+        self.walkable = np.zeros((game_map.height + 2) * self.stride, np.uint8)
+        self._copy_walkable(0, 0, game_map.width, game_map.height)
+        self.offsets = np.array([-1, 1, -self.stride, self.stride])
+        self.fields = {}  # Target -> DistanceField, built on first query
+        game_map.add_tile_listener(self.on_tiles_changed)
+
+    def _index(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def _position(self, index):
+        return (index % self.stride - 1, index // self.stride - 1)
+
+    def _copy_walkable(self, x, y, width, height):
+        """Copy a rectangle from the walkability grid"""
+        for row in range(y, y + height):
+            start = row * self.grid.width + x
+            padded_start = self._index(x, row)
+            self.walkable[padded_start:padded_start + width] = np.frombuffer(self.grid.cells, np.uint8, width, start)
+
+    @staticmethod
+    def _ore_rock_ids(ore_type):
+        return [rock_id for rock_id, rock_type in enumerate(ROCK_TYPE_TABLE)
+                if rock_type and rock_type['ore_type'] == ore_type]
+
+    def _is_target(self, target, x, y):
+        tile = self.map.tiles[y, x]
+        if isinstance(target, str):
+            return tile == TileTypes.ROCK and self.map.rocks[y, x] in self._ore_rock_ids(target)
+        return tile == target
+
+    def _find_targets(self, target):
+        if isinstance(target, str):
+            mask = (self.map.tiles == TileTypes.ROCK) & np.isin(self.map.rocks, self._ore_rock_ids(target))
+        else:
+            mask = self.map.tiles == target
+        ys, xs = np.nonzero(mask)
+        return set(zip(xs.tolist(), ys.tolist()))
+
+    def _build(self, target):
+        targets = self._find_targets(target)
+        distances = np.full(self.walkable.size, -1, np.int32)
+        owners = np.full(self.walkable.size, -1, np.int32)
+
+        # Every walkable tile beside a target is a source at distance 0
+        sources = [neighbour for x, y in targets for neighbour in self.offsets + self._index(x, y)
+                   if self.walkable[neighbour]]
+        frontier = np.unique(np.array(sources, np.int64))
+        distances[frontier] = 0
+        owners[frontier] = frontier
+
+        # Expand a whole BFS ring at a time
+        distance = 0
+        while frontier.size:
+            distance += 1
+            neighbours = (frontier[:, None] + self.offsets).ravel()
+            parents = np.repeat(frontier, len(self.offsets))
+            keep = (self.walkable[neighbours] == 1) & (distances[neighbours] == -1)
+            neighbours, first = np.unique(neighbours[keep], return_index=True)
+            distances[neighbours] = distance
+            owners[neighbours] = owners[parents[keep][first]]
+            frontier = neighbours
+
+        return DistanceField(targets, distances, owners)
+
+    def _is_source(self, field, index):
+        """Whether a padded index is a walkable tile beside one of the field's targets"""
+        return bool(self.walkable[index]) and any(
+            self._position(index + offset) in field.targets for offset in self.offsets)
+
+    def _patch(self, field, target, x, y, width, height):
+        """Bring a field up to date after a rectangle of tiles changed"""
+        distances, owners = field.distances, field.owners
+        for tile_y in range(y, y + height):
+            for tile_x in range(x, x + width):
+                if self._is_target(target, tile_x, tile_y):
+                    field.targets.add((tile_x, tile_y))
+                else:
+                    field.targets.discard((tile_x, tile_y))
+
+        # Only the changed tiles and the ring around them can have stopped
+        # or started being sources
+        nearby = [self._index(tile_x, tile_y)
+                  for tile_y in range(max(0, y - 1), min(self.map.height, y + height + 1))
+                  for tile_x in range(max(0, x - 1), min(self.map.width, x + width + 1))]
+
+        # Clear every tile whose distance may have depended on a tile that's
+        # now blocked or a source that's gone. Anything counting up from such
+        # a tile could have been routed through it.
+        cleared = {index for index in nearby if distances[index] >= 0 and
+                   (not self.walkable[index] or (distances[index] == 0 and not self._is_source(field, index)))}
+        queue = deque(cleared)
+        while queue:
+            current = queue.popleft()
+            for offset in self.offsets:
+                neighbour = current + offset
+                if neighbour not in cleared and distances[neighbour] == distances[current] + 1:
+                    cleared.add(neighbour)
+                    queue.append(neighbour)
+        for index in cleared:
+            distances[index] = -1
+            owners[index] = -1
+
+        # Relax outwards, nearest first, from new sources and from every
+        # known distance bordering the cleared or changed tiles
+        pending = []
+        for index in nearby:
+            if distances[index] != 0 and self._is_source(field, index):
+                distances[index] = 0
+                owners[index] = index
+        for index in cleared.union(nearby):
+            for neighbour in (index, *(index + self.offsets)):
+                if distances[neighbour] >= 0:
+                    pending.append((int(distances[neighbour]), int(neighbour)))
+        heapq.heapify(pending)
+        while pending:
+            distance, current = heapq.heappop(pending)
+            if distances[current] != distance:
+                continue  # Already reached more directly
+            for offset in self.offsets:
+                neighbour = current + offset
+                if self.walkable[neighbour] and (distances[neighbour] == -1 or distances[neighbour] > distance + 1):
+                    distances[neighbour] = distance + 1
+                    owners[neighbour] = owners[current]
+                    heapq.heappush(pending, (distance + 1, int(neighbour)))
+
+    def on_tiles_changed(self, x, y, width, height):
+        self._copy_walkable(x, y, width, height)
+        if width * height > self.MAX_CHECKED_REGION:
+            self.fields.clear()
+            return
+        for target, field in self.fields.items():
+            self._patch(field, target, x, y, width, height)
+
+    def field(self, target):
+        field = self.fields.get(target)
+        if field is None:
+            field = self._build(target)
+            self.fields[target] = field
+        return field
+
+    def nearest(self, target, position):
+        """
+        Returns (target position, standing position, distance) for the closest
+        reachable target from position, or None if there isn't one.
+        """
+        field = self.field(target)
+        index = self._index(*position)
+        if field.distances[index] < 0:
+            return None
+        stand = int(field.owners[index])
+        stand_x, stand_y = self._position(stand)
+        target_position = next((neighbour for neighbour in ((stand_x - 1, stand_y), (stand_x + 1, stand_y),
+                                                            (stand_x, stand_y - 1), (stand_x, stand_y + 1))
+                                if neighbour in field.targets), None)
+        return target_position, (stand_x, stand_y), int(field.distances[index])
+
+    def next_step(self, target, position):
+        """The neighbouring tile to step onto to get closer to target, or None if already there or unreachable"""
+        field = self.field(target)
+        index = self._index(*position)
+        distance = field.distances[index]
+        if distance <= 0:
+            return None
+        for offset in self.offsets:
+            if field.distances[index + offset] == distance - 1:
+                return self._position(index + offset)
+        return None
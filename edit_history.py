@@ -0,0 +1,194 @@
+import numpy as np
+from collections import deque
+
+def _compact(values):
+    """Store a run of identical values (the usual case for fills) as one broadcast value"""
+    if values.size > 1 and (values == values[0]).all():
+        return np.broadcast_to(values[:1].copy(), values.shape)
+    return values
+
+def _copy_stack(value):
+    """Copy what Map.items holds for a tile (an item, a list of items or None) so later edits can't change it"""
+    return list(value) if isinstance(value, list) else value
+
+def _array_bytes(values):
+    # Broadcast arrays only hold a single element
+    return values.itemsize if values.size and values.strides == (0,) else values.nbytes
+
+class MapDiff:
+    """
+    One editor command as the tiles, rock types and item stacks it changed.
+    Tiles are stored as flat y * width + x indices with their old and new
+    values, so a fill over a large area costs a few bytes per changed tile.
+    """
+    ITEM_ENTRY_BYTES = 100  # Rough cost of one item stack change, for the budget
+
+    def __init__(self, indices, old_tiles, new_tiles, old_rocks, new_rocks, items):
+        self.indices = indices
+        self.old_tiles = _compact(old_tiles)
+        self.new_tiles = _compact(new_tiles)
+        self.old_rocks = _compact(old_rocks)
+        self.new_rocks = _compact(new_rocks)
+        self.items = items  # [(pos, old value, new value)] as stored in Map.items, None for nothing
+
+    @property
+    def nbytes(self):
+        return (self.indices.nbytes + sum(_array_bytes(values) for values in (
+                    self.old_tiles, self.new_tiles, self.old_rocks, self.new_rocks)) +
+                len(self.items) * self.ITEM_ENTRY_BYTES)
+
+    def is_empty(self):
+        return not self.indices.size and not self.items
+
+    def apply(self, game_map, undo=False):
+        tiles, rocks = (self.old_tiles, self.old_rocks) if undo else (self.new_tiles, self.new_rocks)
+        game_map.put_tiles(self.indices, tiles, rocks)
+        for pos, old_value, new_value in self.items:
+            game_map.set_items(pos, _copy_stack(old_value if undo else new_value))
+
+class EditHistory:
+    """
+    Undo and redo for the map editor. An edit is recorded between begin() and
+    end(): before changing anything the editor touches the tiles and item
+    positions it's about to write, and end() turns them into a MapDiff of
+    only what actually changed. Everything between begin() and end(), such
+    as a whole drag stroke or a fill, undoes as one command.
+
+    The oldest commands are forgotten once the history is over byte_budget.
+    """
+    DEFAULT_BYTE_BUDGET = 64 * 1024 * 1024
+
+    def __init__(self, game_map, byte_budget=DEFAULT_BYTE_BUDGET):
+        self.map = game_map
+        self.byte_budget = byte_budget
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.nbytes = 0  # Size of everything on both stacks
+        self._recording = False
+        self._indices = []  # Arrays of touched tile indices, in order
+        self._old_tiles = []
+        self._old_rocks = []
+        self._old_items = {}  # pos -> Map.items value before the first touch
+
+    def set_map(self, game_map):
+        """Start over with a different map, e.g. after loading or resizing"""
+        self.map = game_map
+        self.clear()
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.nbytes = 0
+        self._reset_recording()
+
+    def _reset_recording(self):
+        self._recording = False
+        self._indices = []
+        self._old_tiles = []
+        self._old_rocks = []
+        self._old_items = {}
+
+    def begin(self):
+        """Start recording a command. Nested calls join the command already being recorded."""
+        self._recording = True
+
+    def touch(self, xs, ys):
+        """Remember the current tiles at positions (ints or arrays) about to be changed"""
+        if self._recording:
+            self.touch_indices(np.asarray(ys, np.int64).ravel() * self.map.width + np.asarray(xs, np.int64).ravel())
+
+    def touch_indices(self, indices):
+        """Remember the current tiles at flat y * width + x indices about to be changed"""
+        if not self._recording:
+            return
+        self._indices.append(indices)
+        self._old_tiles.append(np.take(self.map.tiles, indices))
+        self._old_rocks.append(np.take(self.map.rocks, indices))
+
+    def touch_region(self, x, y, width, height):
+        """Remember a rectangle of tiles (already clipped to the map) about to be changed"""
+        if not self._recording or width <= 0 or height <= 0:
+            return
+        rows = np.arange(y, y + height, dtype=np.int64)[:, None] * self.map.width
+        self._indices.append((rows + np.arange(x, x + width, dtype=np.int64)).ravel())
+        self._old_tiles.append(self.map.tiles[y:y + height, x:x + width].ravel())
+        self._old_rocks.append(self.map.rocks[y:y + height, x:x + width].ravel())
+
+    def touch_items(self, pos):
+        """Remember the item stack at pos before it's changed"""
+        if self._recording and pos not in self._old_items:
+            self._old_items[pos] = _copy_stack(self.map.items.get(pos))
+
+    def end(self):
+        """Finish the command, returning whether it changed anything"""
+        if not self._recording:
+            return False
+        diff = self._build_diff()
+        self._reset_recording()
+        if diff.is_empty():
+            return False
+        # A new edit makes the undone commands unreachable
+        self.nbytes -= sum(undone.nbytes for undone in self.redo_stack)
+        self.redo_stack = []
+        self._push(diff)
+        return True
+
+    def _build_diff(self):
+        if self._indices:
+            indices = np.concatenate(self._indices)
+            # A tile touched several times keeps the value from before its first touch
+            indices, first = np.unique(indices, return_index=True)
+            old_tiles = np.concatenate(self._old_tiles)[first]
+            old_rocks = np.concatenate(self._old_rocks)[first]
+            new_tiles = np.take(self.map.tiles, indices)
+            new_rocks = np.take(self.map.rocks, indices)
+            changed = (old_tiles != new_tiles) | (old_rocks != new_rocks)
+            indices = indices[changed].astype(np.uint32)
+            old_tiles, new_tiles = old_tiles[changed], new_tiles[changed]
+            old_rocks, new_rocks = old_rocks[changed], new_rocks[changed]
+        else:
+            indices = np.zeros(0, np.uint32)
+            old_tiles = new_tiles = old_rocks = new_rocks = np.zeros(0, np.uint8)
+
+        items = []
+        for pos, old_value in self._old_items.items():
+            new_value = _copy_stack(self.map.items.get(pos))
+            if new_value != old_value:
+                items.append((pos, old_value, new_value))
+        return MapDiff(indices, old_tiles, new_tiles, old_rocks, new_rocks, items)
+
+    def _push(self, diff):
+        self.undo_stack.append(diff)
+        self.nbytes += diff.nbytes
+        # Forget the oldest commands, but always keep the newest one
+        while self.nbytes > self.byte_budget and len(self.undo_stack) > 1:
+            self.nbytes -= self.undo_stack.popleft().nbytes
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """Revert the newest command, returning False if there's nothing to undo"""
+        return self._step(self.undo_stack, self.redo_stack, undo=True)
+
+    def redo(self):
+        """Reapply the last undone command, returning False if there's nothing to redo"""
+        return self._step(self.redo_stack, self.undo_stack, undo=False)
+
+    def _step(self, source, destination, undo):
+        # Mid-stroke, close what's been recorded so far and keep recording the
+        # rest of the stroke as a new command afterwards
+        recording = self._recording
+        if recording:
+            self.end()
+        moved = bool(source)
+        if moved:
+            diff = source.pop()
+            diff.apply(self.map, undo=undo)
+            destination.append(diff)
+        if recording:
+            self.begin()
+        return moved
@@ -0,0 +1,77 @@
+import logging
+import os
+from collections import deque
+
+# Every game logger lives under this one, e.g. "game.map" or "game.items"
+ROOT_LOGGER = "game"
+LOG_LEVEL_ENV = "GAME_LOG"  # e.g. GAME_LOG=debug python game_window.py
+DEFAULT_LEVEL = logging.WARNING
+LOG_FORMAT = "%(relativeCreated)8.0f %(levelname)-7s %(name)s: %(message)s"
+
+def get_logger(subsystem):
+    """
+    The logger for one part of the game, e.g. get_logger("map"). Pass values
+    as arguments instead of formatting them yourself,
+        log.debug("Items: %s", items)
+    so nothing is formatted unless the message is actually going somewhere.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent log records in memory. Records are stored as they
+    are and only formatted when read back.
+    """
+    def __init__(self, capacity=500):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def recent(self, count=None):
+        """The last count records (all of them by default) as formatted lines, oldest first"""
+        records = list(self.records)
+        if count is not None:
+            records = records[-count:]
+        return [self.format(record) for record in records]
+
+    def clear(self):
+        self.records.clear()
+
+# Recent events, available whatever the level, e.g. for a crash report
+recent_events = RingBufferHandler()
+
+def configure(level=None, stream=True):
+    """
+    Set how much gets logged. level is a logging level or its name, and
+    defaults to the GAME_LOG environment variable, or warnings only. Messages
+    below the level cost one cached comparison and are never formatted.
+    With stream set, enabled messages are also written to stderr.
+    """
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, DEFAULT_LEVEL)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = DEFAULT_LEVEL
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    root.propagate = False  # Don't depend on how the application set up logging
+    for handler in list(root.handlers):
+        if handler is not recent_events:
+            root.removeHandler(handler)
+    if recent_events not in root.handlers:
+        root.addHandler(recent_events)
+    if stream:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(stream_handler)
+
+def recent(count=None):
+    return recent_events.recent(count)
+
+# Quiet until configured otherwise, but still keep recent warnings
+configure(DEFAULT_LEVEL)
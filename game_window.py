@@ -1,12 +1,21 @@
 import pygame
-from player import Player
 from tile_types import TileTypes
 from items import ItemRegistry
 from map_data import Map
+from map_renderer import MapRenderer
+from simulation import Simulation
+from profiler import FrameProfiler
+from text_cache import TextCache
+import game_log
+
+log = game_log.get_logger("window")
 
 class Game:
-    def __init__(self):
+    def __init__(self, frame_cap=60, profile_path=None, map_name="test_map"):
         pygame.init()
+        self.FRAME_CAP = frame_cap  # Max frames per second, 0 for uncapped
+        self.SIM_STEP = 10  # Milliseconds of game time per simulation step
+        self.MAX_STEPS_PER_FRAME = 25  # Drop time we can't catch up on
         self.TILE_SIZE = 50
         self.VIEWPORT_WIDTH = 16  # Number of tiles visible horizontally
         self.VIEWPORT_HEIGHT = 12  # Number of tiles visible vertically
@@ -18,22 +27,19 @@ class Game:
             self.VIEWPORT_HEIGHT * self.TILE_SIZE + self.GUI_HEIGHT
         ))
         
-        # Load map
-        self.current_map = Map.load_from_file("test_map")
-        
-        # Initialize game state manager
-        from game_state import GameState
-        self.state_manager = GameState(self.current_map)
+        # Game logic runs headless on its own clock, this window just
+        # steps it at a fixed rate and draws it
+        self.sim = Simulation(Map.load_from_file(map_name), tile_size=self.TILE_SIZE)
+        self.sim.add_observer(self)
+        self.current_map = self.sim.current_map
+        self.state_manager = self.sim.state_manager
+        self.scheduler = self.sim.scheduler
+        self.player = self.sim.player
         
         # Camera position (in tile coordinates)
         self.camera_x = 0
         self.camera_y = 0
         
-        # Create player at spawn point
-        self.player = Player(self.TILE_SIZE, self.current_map.tiles)
-        self.player.grid_x, self.player.grid_y = self.current_map.player_spawn
-        self.player.game = self
-        
         # Use items from map
         self.ground_items = self.current_map.items  # This is a reference to map's items
         
@@ -47,6 +53,8 @@ class Game:
         
         # Game state
         self.running = True
+        self.needs_redraw = True  # Set whenever something on screen may have changed
+        self.current_map.add_tile_listener(self.on_tiles_changed)
         
         # Add message system
         self.messages = []
@@ -63,20 +71,23 @@ class Game:
         # Load tile images
         TileTypes.load_images(self.TILE_SIZE)
         
-        # Add font for hover text
-        self.hover_font = pygame.font.Font(None, 24)
+        # Pre-rendered map layer, redrawn only where tiles change
+        self.map_renderer = MapRenderer(self.current_map, self.TILE_SIZE)
+        
+        # Frame timing overlay, toggled with F3
+        self.profiler = FrameProfiler()
+        if profile_path:
+            self.profiler.dump_at_exit(profile_path)
+        
+        # Hover text state
         self.hover_text = None
         self.hover_text_pos = None
         self.show_hover_text = False  # New toggle variable
         self.show_tooltips = False  # Add this line to track tooltip state
         
-        # Add menu manager
-        from menu_manager import MenuManager
-        self.menu_manager = MenuManager()
-        
-        # Add crafting menu
-        from crafting_menu import CraftingMenu
-        self.crafting_menu = CraftingMenu()
+        # Menus belong to the simulation so crafting works headless too
+        self.menu_manager = self.sim.menu_manager
+        self.crafting_menu = self.sim.crafting_menu
         
     def update_camera(self):
         # Center camera on player
@@ -84,8 +95,8 @@ class Game:
         self.camera_y = self.player.grid_y - self.VIEWPORT_HEIGHT // 2
         
         # Ensure camera doesn't go out of map bounds
-        self.camera_x = max(0, min(self.camera_x, len(self.current_map.tiles[0]) - self.VIEWPORT_WIDTH))
-        self.camera_y = max(0, min(self.camera_y, len(self.current_map.tiles) - self.VIEWPORT_HEIGHT))
+        self.camera_x = max(0, min(self.camera_x, self.current_map.width - self.VIEWPORT_WIDTH))
+        self.camera_y = max(0, min(self.camera_y, self.current_map.height - self.VIEWPORT_HEIGHT))
     
     def world_to_screen(self, grid_x, grid_y):
         """Convert world coordinates to screen coordinates"""
@@ -95,14 +106,16 @@ class Game:
     
     def draw(self):
         # Fill with floor color instead of black
-        self.screen.fill(TileTypes.get_tile_properties(TileTypes.FLOOR)['color'])
+        self.screen.fill(TileTypes.get_properties(TileTypes.FLOOR).color)
         
         # Update camera to follow player
         self.update_camera()
         
         # Draw map and items
-        self._draw_map_tiles()
-        self._draw_ground_items()
+        with self.profiler.phase('map'):
+            self._draw_map_tiles()
+        with self.profiler.phase('items'):
+            self._draw_ground_items()
         
         # Draw player
         screen_x = (self.player.grid_x - self.camera_x) * self.TILE_SIZE
@@ -110,64 +123,78 @@ class Game:
         self.player.draw_at_position(self.screen, screen_x, screen_y)
         
         # Draw GUI
-        self.draw_gui()
-        
-        # Draw sleep animation if active
-        if self.sleeping:
-            self._draw_sleep_animation()
+        with self.profiler.phase('gui'):
+            self.draw_gui()
         
-        # Draw hover text if active
-        if self.hover_text and self.hover_text_pos:
-            self._draw_hover_text()
+            # Draw sleep animation if active
+            if self.sleeping:
+                self._draw_sleep_animation()
+            
+            # Draw hover text if active
+            if self.hover_text and self.hover_text_pos:
+                self._draw_hover_text()
         
         # Draw crafting menu if open
         if hasattr(self, 'crafting_menu') and self.crafting_menu.is_open:
-            self.crafting_menu.draw(self.screen, self.player.skills.smithing_level)
+            with self.profiler.phase('crafting'):
+                self.crafting_menu.draw(self.screen, self.player.skills.smithing_level)
+        
+        self.profiler.draw(self.screen)
         
-        pygame.display.flip()
+        with self.profiler.phase('flip'):
+            pygame.display.flip()
+        self.needs_redraw = False
+    
+    def is_animating(self):
+        """Whether something on screen changes every frame without any input"""
+        # The profiler overlay is live, so keep drawing while it's up
+        return (self.sleeping and self.fade_alpha < 255) or self.profiler.visible
+    
+    def next_message_expiry(self):
+        if not self.messages:
+            return None
+        return min(msg['time'] for msg in self.messages) + self.MESSAGE_DURATION
+    
+    def should_draw(self):
+        """Whether the next frame would look any different from the last one"""
+        expiry = self.next_message_expiry()
+        return (self.needs_redraw or self.is_animating() or
+                (expiry is not None and expiry <= pygame.time.get_ticks()))
+    
+    def idle_timeout(self, lag=0):
+        """
+        Milliseconds the loop can block waiting for input before a timer,
+        animation or message needs it. 0 means don't block, None means block
+        until input arrives.
+        """
+        if self.needs_redraw or self.is_animating():
+            return 0
+        timeouts = []
+        next_event = self.sim.time_until_next()
+        if next_event is not None:
+            timeouts.append(next_event - lag)
+        expiry = self.next_message_expiry()
+        if expiry is not None:
+            timeouts.append(expiry - pygame.time.get_ticks())
+        return max(1, min(timeouts)) if timeouts else None
     
     def _draw_map_tiles(self):
-        """Draw the visible map tiles"""
-        for y in range(self.VIEWPORT_HEIGHT):
-            for x in range(self.VIEWPORT_WIDTH):
-                map_x = int(x + self.camera_x)
-                map_y = int(y + self.camera_y)
-                
-                screen_x = x * self.TILE_SIZE
-                screen_y = y * self.TILE_SIZE
-                
-                # Draw actual tiles if within map bounds
-                if (0 <= map_x < len(self.current_map.tiles[0]) and 
-                    0 <= map_y < len(self.current_map.tiles)):
-                    
-                    tile = self.current_map.tiles[map_y][map_x]
-                    tile_props = TileTypes.get_tile_properties(tile, (map_x, map_y))
-                    
-                    if tile_props.get('has_image', False) and tile in TileTypes.tile_images:
-                        self.screen.blit(TileTypes.tile_images[tile], (screen_x, screen_y))
-                    else:
-                        color = tile_props.get('color', (100, 100, 100))
-                        pygame.draw.rect(self.screen, color, 
-                                      (screen_x, screen_y, self.TILE_SIZE, self.TILE_SIZE))
+        """Draw the visible map tiles from the cached map layer"""
+        self.map_renderer.draw(self.screen, self.camera_x, self.camera_y,
+                               self.VIEWPORT_WIDTH, self.VIEWPORT_HEIGHT)
     
     def _draw_ground_items(self):
-        """Draw items on the ground"""
-        for pos, items in self.ground_items.items():
-            screen_x = (pos[0] - self.camera_x) * self.TILE_SIZE
-            screen_y = (pos[1] - self.camera_y) * self.TILE_SIZE
-            
-            if (0 <= screen_x < self.VIEWPORT_WIDTH * self.TILE_SIZE and
-                0 <= screen_y < self.VIEWPORT_HEIGHT * self.TILE_SIZE):
-                # If it's a list, draw the last item in the stack
-                if isinstance(items, list) and items:
-                    items[-1].draw(self.screen, screen_x, screen_y, self.TILE_SIZE)
-                # Handle old format (single item)
-                elif not isinstance(items, list):
-                    items.draw(self.screen, screen_x, screen_y, self.TILE_SIZE)
+        """Draw items on the ground, looking up only the visible ones"""
+        visible_items = self.current_map.items_in_rect(self.camera_x, self.camera_y,
+                                                       self.VIEWPORT_WIDTH, self.VIEWPORT_HEIGHT)
+        for pos, items in visible_items:
+            screen_x, screen_y = self.world_to_screen(*pos)
+            # Draw the last item in the stack
+            items[-1].draw(self.screen, screen_x, screen_y, self.TILE_SIZE)
     
     def _draw_hover_text(self):
         """Draw hover text with background"""
-        text_surface = self.hover_font.render(self.hover_text, True, (255, 255, 255))
+        text_surface = TextCache.render(self.hover_text, 24)
         text_rect = text_surface.get_rect(center=self.hover_text_pos)
         
         # Draw background for better visibility
@@ -195,25 +222,34 @@ class Game:
         
         # Draw "Zzzzz" text
         if self.fade_alpha > 128:  # Show text when mostly faded
-            font = pygame.font.Font(None, 72)
-            text = font.render("Zzzzz...", True, (255, 255, 255))
+            text = TextCache.render("Zzzzz...", 72)
             text_rect = text.get_rect(center=(self.VIEWPORT_WIDTH * self.TILE_SIZE // 2,
                                             self.VIEWPORT_HEIGHT * self.TILE_SIZE // 2))
             self.screen.blit(text, text_rect)
             
             if elapsed >= self.sleep_duration:
                 # Show wake up prompt
-                font = pygame.font.Font(None, 36)
-                prompt = font.render("Click or press any key to wake up", True, (200, 200, 200))
+                prompt = TextCache.render("Click or press any key to wake up", 36, (200, 200, 200))
                 prompt_rect = prompt.get_rect(center=(self.VIEWPORT_WIDTH * self.TILE_SIZE // 2,
                                                     text_rect.bottom + 40))
                 self.screen.blit(prompt, prompt_rect)
     
     def add_message(self, text):
-        # Add new message with timestamp
+        self.sim.add_message(text)
+
+    def on_tiles_changed(self, x, y, width, height):
+        self.needs_redraw = True
+
+    def on_player_moved(self, x, y):
+        self.needs_redraw = True
+
+    def on_message(self, text):
+        self.needs_redraw = True
+        # Add new message with timestamp, rendered once up front
         self.messages.append({
             'text': text,
-            'time': pygame.time.get_ticks()
+            'time': pygame.time.get_ticks(),
+            'surface': TextCache.get_font(24).render(text, True, (255, 255, 255))
         })
         # Keep only the most recent messages
         if len(self.messages) > self.MAX_MESSAGES:
@@ -227,7 +263,6 @@ class Game:
         
         # Draw messages
         current_time = pygame.time.get_ticks()
-        font = pygame.font.Font(None, 24)
         message_y = 5  # Start at top of screen
         
         # Filter out old messages and draw remaining ones
@@ -235,8 +270,7 @@ class Game:
                         if current_time - msg['time'] < self.MESSAGE_DURATION]
         
         for msg in self.messages:
-            text_surface = font.render(msg['text'], True, (255, 255, 255))
-            self.screen.blit(text_surface, (10, message_y))
+            self.screen.blit(msg['surface'], (10, message_y))
             message_y += 20  # Space between messages
         
         # Draw health bar
@@ -245,15 +279,13 @@ class Game:
                         (10, gui_y + 10, health_width, 20))
         
         # Draw GUI buttons
-        font = pygame.font.Font(None, 24)
-        
         # Inventory button
         inv_button_rect = pygame.Rect(self.VIEWPORT_WIDTH * self.TILE_SIZE - 220, 
                                      gui_y + 10, 
                                      self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
         button_color = self.BUTTON_HOVER_COLOR if self.player.inventory.is_open else self.BUTTON_COLOR
         pygame.draw.rect(self.screen, button_color, inv_button_rect)
-        inv_text = font.render("Inventory (I)", True, (255, 255, 255))
+        inv_text = TextCache.render("Inventory (I)", 24)
         self.screen.blit(inv_text, (inv_button_rect.x + 10, inv_button_rect.y + 10))
         
         # Skills button
@@ -262,16 +294,18 @@ class Game:
                                        self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
         button_color = self.BUTTON_HOVER_COLOR if self.player.skills.is_open else self.BUTTON_COLOR
         pygame.draw.rect(self.screen, button_color, skills_button_rect)
-        skills_text = font.render("Skills (K)", True, (255, 255, 255))
+        skills_text = TextCache.render("Skills (K)", 24)
         self.screen.blit(skills_text, (skills_button_rect.x + 15, skills_button_rect.y + 10))
         
         # Draw inventory if open
         if self.player.inventory.is_open:
-            self.player.inventory.draw(self.screen)
+            with self.profiler.phase('inventory'):
+                self.player.inventory.draw(self.screen)
         
         # Draw skills if open
         if self.player.skills.is_open:
-            self.player.skills.draw(self.screen)
+            with self.profiler.phase('skills'):
+                self.player.skills.draw(self.screen)
     
     def handle_click(self, pos, button):
         # If crafting menu is open, check if click is outside
@@ -301,37 +335,59 @@ class Game:
         tile_x = mouse_x // self.TILE_SIZE + self.camera_x
         tile_y = mouse_y // self.TILE_SIZE + self.camera_y
         
-        # Only handle map clicks if inventory is closed
+        # Only handle map clicks if inventory is closed, and not in the GUI below the map
         if (0 <= tile_x < len(self.current_map.tiles[0]) and 
-            0 <= tile_y < len(self.current_map.tiles)):
+            0 <= tile_y < len(self.current_map.tiles) and
+            mouse_y < self.VIEWPORT_HEIGHT * self.TILE_SIZE):
+            
+            # Left click on open ground walks there
+            if button == 1 and self.sim.walkability.is_walkable(tile_x, tile_y):
+                if not self.sim.walk_to(tile_x, tile_y):
+                    self.add_message("Can't get there")
             
             # Handle interaction if player has equipped item (left click only)
-            if button == 1 and self.player.equipped_item:
+            elif button == 1 and self.player.equipped_item:
                 self.player.equipped_item.use(self.player, tile_x, tile_y)
             
             # Show tooltip on right click
             elif button == 3:
                 tile = self.current_map.tiles[tile_y][tile_x]
-                tile_props = TileTypes.get_tile_properties(tile, (tile_x, tile_y))
                 
                 # Show tile info
-                info = f"Tile: {tile_props.get('name', 'Unknown')}"
-                if tile == TileTypes.ROCK and (tile_x, tile_y) in TileTypes.rock_data:
-                    rock_data = TileTypes.rock_data[(tile_x, tile_y)]
-                    info += f" ({rock_data['name']}, Level {rock_data['mining_level']})"
+                info = f"Tile: {TileTypes.get_properties(tile).name}"
+                rock_type = self.current_map.rock_type_at(tile_x, tile_y)
+                if tile == TileTypes.ROCK and rock_type:
+                    info += f" ({rock_type['name']}, Level {rock_type['mining_level']})"
                 
                 self.add_message(info)
         
         return True
     
-    def handle_events(self):
-        for event in pygame.event.get():
+    def handle_events(self, timeout=0):
+        """
+        Handle pending input. If there is none, first block for up to timeout
+        milliseconds (None for no limit) waiting for some. Returns how long
+        was spent blocked.
+        """
+        waited = 0
+        events = pygame.event.get()
+        if not events and timeout != 0:
+            wait_start = pygame.time.get_ticks()
+            # Idle time isn't part of the frame that ends up handling the event
+            with self.profiler.paused():
+                event = pygame.event.wait() if timeout is None else pygame.event.wait(timeout)
+            waited = pygame.time.get_ticks() - wait_start
+            if event.type != pygame.NOEVENT:
+                events = [event] + pygame.event.get()
+        
+        for event in events:
+            self.needs_redraw = True
             if event.type == pygame.QUIT:
                 self.running = False
             elif self.sleeping and pygame.time.get_ticks() - self.sleep_start_time >= self.sleep_duration:
                 if event.type in [pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN]:
                     self.sleeping = False
-                    self.player.complete_sleep()
+                    self.sim.wake()
             elif not self.sleeping:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 3:  # Right click
@@ -339,7 +395,10 @@ class Game:
                     if self.handle_click(event.pos, event.button):
                         continue
                 elif event.type == pygame.KEYDOWN:
-                    self.player.handle_input(event)
+                    if event.key == pygame.K_F3:
+                        self.profiler.toggle()
+                    else:
+                        self.player.handle_input(event)
             
             # Only update hover text if tooltips are enabled
             if self.show_tooltips:
@@ -348,21 +407,50 @@ class Game:
             else:
                 self.hover_text = ''
                 self.hover_text_pos = None
+        
+        return waited
     
     def run(self):
         clock = pygame.time.Clock()
+        lag = 0  # Real time not yet simulated, in milliseconds
         
         while self.running:
-            self.handle_events()
-            self.player.update()
-            self.draw()
-            pygame.display.flip()
-            clock.tick(60)
+            self.profiler.begin_frame()
+            
+            # Sleep on the event queue while nothing needs updating
+            with self.profiler.phase('events'):
+                waited = self.handle_events(self.idle_timeout(lag))
+            with self.profiler.phase('wait'):
+                lag += clock.tick(self.FRAME_CAP)
+            
+            # Advance the simulation in fixed steps regardless of frame rate.
+            # Time spent blocked on input is always caught up in full.
+            with self.profiler.phase('simulation'):
+                steps = 0
+                max_steps = self.MAX_STEPS_PER_FRAME + waited // self.SIM_STEP
+                while lag >= self.SIM_STEP and steps < max_steps:
+                    self.sim.advance(self.SIM_STEP)
+                    lag -= self.SIM_STEP
+                    steps += 1
+                if steps == max_steps:
+                    lag = 0
+            
+            # draw() flips the display, skip it entirely when nothing changed
+            if self.should_draw():
+                self.draw()
+                self.profiler.end_frame()
+            else:
+                # Idle iterations aren't frames
+                self.profiler.cancel_frame()
         
         pygame.quit()
 
     def start_sleep_animation(self):
-        print("Starting sleep animation")  # Debug print
+        self.sim.start_sleep()
+
+    def on_sleep_started(self):
+        log.debug("Starting sleep animation")
+        self.needs_redraw = True
         self.sleeping = True
         self.sleep_start_time = pygame.time.get_ticks()
         self.fade_alpha = 0
@@ -385,24 +473,18 @@ class Game:
             mouse_y < self.VIEWPORT_HEIGHT * self.TILE_SIZE):  # Not in GUI area
             
             # Check for items first (they're on top)
-            pos = (tile_x, tile_y)
-            if pos in self.ground_items:
-                items = self.ground_items[pos]
-                # Handle both single items and lists of items
-                if isinstance(items, list):
-                    if len(items) == 1:
-                        self.hover_text = f"Item: {items[0].name}"
-                    else:
-                        item_names = [item.name for item in items]
-                        self.hover_text = f"Items: {', '.join(item_names)}"
+            items = self.current_map.items_at(tile_x, tile_y)
+            if items:
+                if len(items) == 1:
+                    self.hover_text = f"Item: {items[0].name}"
                 else:
-                    # Single item (old format)
-                    self.hover_text = f"Item: {items.name}"
+                    item_names = [item.name for item in items]
+                    self.hover_text = f"Items: {', '.join(item_names)}"
             else:
                 # If no item, show tile info
                 tile = self.current_map.tiles[tile_y][tile_x]
-                tile_props = TileTypes.get_tile_properties(tile, (tile_x, tile_y))
-                self.hover_text = tile_props.get('name', '')
+                rock_type = self.current_map.rock_type_at(tile_x, tile_y) if tile == TileTypes.ROCK else None
+                self.hover_text = rock_type['name'] if rock_type else TileTypes.get_properties(tile).name
             
             # Position text above the tile
             self.hover_text_pos = (
@@ -413,5 +495,6 @@ class Game:
             self.hover_text = ''
 
 if __name__ == "__main__":
+    game_log.configure()  # Level from the GAME_LOG environment variable
     game = Game()
     game.run()
@@ -1,4 +1,9 @@
 import pygame
+from items import ItemRegistry
+from text_cache import TextCache
+from game_log import get_logger
+
+log = get_logger("inventory")
 
 class Inventory:
     def __init__(self):
@@ -9,17 +14,100 @@ class Inventory:
         self.tooltip_item = None
         self.tooltip_pos = None
         self.player = None  # Will be set by Player class
+        # Index of occupied slots and total units by item type
+        self.type_slots = {}  # item_type -> [slot_index, ...]
+        self.type_counts = {}  # item_type -> total quantity
         
     def toggle(self):
         self.is_open = not self.is_open
         
+    def _index_remove(self, item, slot_index):
+        slots = self.type_slots[item.item_type]
+        slots.remove(slot_index)
+        self.type_counts[item.item_type] -= item.quantity
+        if not slots:
+            del self.type_slots[item.item_type]
+            del self.type_counts[item.item_type]
+            
+    def _index_add(self, item, slot_index):
+        self.type_slots.setdefault(item.item_type, []).append(slot_index)
+        self.type_counts[item.item_type] = self.type_counts.get(item.item_type, 0) + item.quantity
+        
+    def set_slot(self, slot_index, item):
+        """Put an item (or None) in a slot, keeping the type index up to date"""
+        old_item = self.items[slot_index]
+        if old_item:
+            self._index_remove(old_item, slot_index)
+        self.items[slot_index] = item
+        if item:
+            self._index_add(item, slot_index)
+            
+    def slots_of(self, item_type):
+        """Slots holding an item type, in the order they were filled"""
+        return self.type_slots.get(item_type, [])
+        
+    def count(self, item_type):
+        """Total units of an item type across all slots"""
+        return self.type_counts.get(item_type, 0)
+        
+    def has(self, item_type, quantity=1):
+        return self.count(item_type) >= quantity
+        
+    def take(self, item_type, quantity=1):
+        """Remove units of an item type. Returns False (removing nothing) if there aren't enough."""
+        if not self.has(item_type, quantity):
+            return False
+        while quantity > 0:
+            slot_index = self.type_slots[item_type][-1]
+            taken = min(quantity, self.items[slot_index].quantity)
+            self.remove_quantity(slot_index, taken)
+            quantity -= taken
+        return True
+        
+    def _stack_of(self, item_type):
+        """The existing stack for a stackable item type, or None"""
+        slots = self.type_slots.get(item_type)
+        if slots and self.items[slots[0]].stackable:
+            return self.items[slots[0]]
+        return None
+        
     def add_item(self, item):
+        # Stackable items merge into an existing stack
+        stack = self._stack_of(item.item_type) if item.stackable else None
+        if stack:
+            stack.quantity += item.quantity
+            self.type_counts[item.item_type] += item.quantity
+            return True
+            
         for i in range(self.size):
             if self.items[i] is None:
-                self.items[i] = item
+                self.set_slot(i, item)
                 return True
         return False
         
+    def add_item_type(self, item_type, quantity=1):
+        """
+        Add units of a registered item type. Existing stacks just grow, so no
+        item is created. Returns the stack that was added to, or None if full.
+        """
+        stack = self._stack_of(item_type)
+        if stack:
+            stack.quantity += quantity
+            self.type_counts[item_type] += quantity
+            return stack
+            
+        item = ItemRegistry.create_item(item_type, quantity)
+        return item if self.add_item(item) else None
+        
+    def remove_quantity(self, slot_index, quantity=1):
+        """Take units from the stack in a slot, emptying the slot when none are left"""
+        item = self.items[slot_index]
+        if item.quantity <= quantity:
+            self.set_slot(slot_index, None)
+        else:
+            item.quantity -= quantity
+            self.type_counts[item.item_type] -= quantity
+        
     def handle_click(self, pos, button):
         if not self.is_open:
             return False
@@ -60,20 +148,17 @@ class Inventory:
     def drop_item(self, slot_index):
         dropped_item = self.items[slot_index]
         if dropped_item:
-            self.items[slot_index] = None
+            # The whole stack is dropped together
+            self.set_slot(slot_index, None)
             if dropped_item.equipped:
                 dropped_item.equip(self.player)  # Unequip if equipped
             
             # Get player's position
             pos = (self.player.grid_x, self.player.grid_y)
             
-            # Initialize list for position if it doesn't exist
-            if pos not in self.player.game.ground_items:
-                self.player.game.ground_items[pos] = []
-            
             # Add item to the stack
-            self.player.game.ground_items[pos].append(dropped_item)
-            print(f"Dropped {dropped_item.name}")
+            self.player.game.current_map.place_item(pos, dropped_item)
+            log.debug("Dropped %s at %s", dropped_item.name, pos)
         
     def draw(self, screen):
         if not self.is_open:
@@ -107,6 +192,11 @@ class Inventory:
                                    (slot_x, slot_y, slot_size - 2, slot_size - 2), 2)
                 self.items[i].draw(screen, slot_x, slot_y, slot_size)
                 
+                # Draw stack size
+                if self.items[i].quantity > 1:
+                    count_text = TextCache.render(str(self.items[i].quantity), 18)
+                    screen.blit(count_text, (slot_x + 2, slot_y + 2))
+                
                 # Check for tooltip
                 if (slot_x <= mouse_pos[0] <= slot_x + slot_size and 
                     slot_y <= mouse_pos[1] <= slot_y + slot_size):
@@ -120,11 +210,10 @@ class Inventory:
 
     def draw_tooltip(self, screen):
         padding = 5
-        font = pygame.font.Font(None, 24)
         
         # Create tooltip text
-        name_text = font.render(self.tooltip_item.name, True, (255, 255, 255))
-        desc_text = font.render(self.tooltip_item.description, True, (255, 255, 255))
+        name_text = TextCache.render(self.tooltip_item.name, 24)
+        desc_text = TextCache.render(self.tooltip_item.description, 24)
         
         # Calculate tooltip dimensions
         width = max(name_text.get_width(), desc_text.get_width()) + padding * 2
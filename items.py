@@ -1,5 +1,8 @@
 import pygame
 from tile_types import TileTypes
+from game_log import get_logger
+
+log = get_logger("items")
 
 class ItemRegistry:
     _registered_items = {}
@@ -19,9 +22,12 @@ class ItemRegistry:
         cls._registered_items[name] = creator_func
         
     @classmethod
-    def create_item(cls, item_name):
+    def create_item(cls, item_name, quantity=1):
         if item_name in cls._registered_items:
-            return cls._registered_items[item_name]()
+            item = cls._registered_items[item_name]()
+            item.item_type = item_name
+            item.quantity = quantity
+            return item
         raise ValueError(f"Unknown item: {item_name}")
     
     @classmethod
@@ -37,6 +43,9 @@ class Item:
         self.equipped = False
         self.equippable = True
         self.equipment_slot = None  # Will be set by child classes
+        self.item_type = None  # Registry name, set by ItemRegistry.create_item
+        self.stackable = False  # Stackable items share one inventory slot
+        self.quantity = 1
         
     def draw(self, screen, x, y, size):
         pygame.draw.rect(screen, self.icon_color, 
@@ -75,6 +84,7 @@ class Ore(Item):
             icon_color=color
         )
         self.equippable = False
+        self.stackable = True
 
 class MetalBar(Item):
     def __init__(self, name, color):
@@ -84,6 +94,7 @@ class MetalBar(Item):
             icon_color=color
         )
         self.equippable = False
+        self.stackable = True
 
 @ItemRegistry.register_item
 class Pickaxe(Item):
@@ -100,11 +111,10 @@ class Pickaxe(Item):
             return
             
         target_tile = player.map_data[target_y][target_x]
-        tile_props = TileTypes.get_tile_properties(target_tile, (target_x, target_y))
+        rock_type = player.game.current_map.rock_type_at(target_x, target_y)
+        tile_props = TileTypes.get_tile_properties(target_tile, rock_type=rock_type)
         
-        print(f"Mining at position ({target_x}, {target_y})")  # Debug
-        print(f"Tile properties: {tile_props}")  # Debug
-        print(f"Rock data: {TileTypes.rock_data}")  # Debug
+        log.debug("Mining at (%d, %d): %s", target_x, target_y, tile_props)
         
         if tile_props.get('mineable', False):
             required_level = tile_props.get('mining_level', 0)
@@ -112,13 +122,13 @@ class Pickaxe(Item):
                 # Handle ore drops if it's a rock
                 if target_tile == TileTypes.ROCK:
                     ore_type = tile_props.get('ore_type')
-                    print(f"Found ore type: {ore_type}")  # Debug
+                    log.debug("Found ore type: %s", ore_type)
                     
                     if ore_type:
-                        # Create and add ore to inventory
-                        ore_item = ItemRegistry.create_item(f"{ore_type}_ore")
-                        if player.inventory.add_item(ore_item):
-                            player.game.add_message(f"Added {ore_item.name} to inventory")
+                        # Add ore to inventory, stacking with any ore already there
+                        ore_stack = player.inventory.add_item_type(f"{ore_type}_ore")
+                        if ore_stack:
+                            player.game.add_message(f"Added {ore_stack.name} to inventory")
                             # Add and show XP gain
                             xp_gain = tile_props.get('mining_xp', 10)
                             player.skills.add_mining_xp(xp_gain)
@@ -126,11 +136,12 @@ class Pickaxe(Item):
                         else:
                             player.game.add_message("Inventory full!")
                     
-                    # Replace with depleted rock
-                    player.map_data[target_y][target_x] = TileTypes.DEPLETED_ROCK
+                    # Replace with depleted rock until it respawns
+                    player.game.current_map.set_tile(target_x, target_y, TileTypes.DEPLETED_ROCK)
+                    player.game.rock_depleted(target_x, target_y)
                 else:
                     # Normal mining behavior for non-rock tiles
-                    player.map_data[target_y][target_x] = TileTypes.FLOOR
+                    player.game.current_map.set_tile(target_x, target_y, TileTypes.FLOOR)
 
 @ItemRegistry.register_item
 class Hammer(Item):
@@ -171,68 +182,3 @@ ItemRegistry.register_item_type("bronze_plate_body",
     lambda: Item("Bronze Plate Body", "Bronze body armor", (205, 127, 50)))
 ItemRegistry.register_item_type("iron_dagger", 
     lambda: Item("Iron Dagger", "A small iron dagger", (192, 192, 192)))
-
-class Player:
-    def handle_input(self, event):
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_e:
-                self.try_smelting()
-            # ... rest of input handling ...
-    
-    def try_smelting(self):
-        # Get tile in front of player based on direction
-        target_x, target_y = self.get_facing_tile()
-        target_tile = self.map_data[target_y][target_x]
-        tile_props = TileTypes.get_tile_properties(target_tile)
-        
-        if tile_props.get('smeltable', False):
-            # Check for required ores
-            copper_ore = None
-            tin_ore = None
-            copper_slot = None
-            tin_slot = None
-            
-            # Find copper and tin ores in inventory
-            for i, item in enumerate(self.inventory.items):
-                if item:
-                    if item.name == "Copper Ore" and not copper_ore:
-                        copper_ore = item
-                        copper_slot = i
-                    elif item.name == "Tin Ore" and not tin_ore:
-                        tin_ore = item
-                        tin_slot = i
-            
-            # If we have both ores, create bronze bar
-            if copper_ore and tin_ore:
-                # Remove the ores
-                self.inventory.items[copper_slot] = None
-                self.inventory.items[tin_slot] = None
-                
-                # Create and add bronze bar
-                bronze_bar = ItemRegistry.create_item("bronze_bar")
-                if self.inventory.add_item(bronze_bar):
-                    print("Successfully smelted a Bronze Bar!")
-                    # Award smithing XP
-                    self.skills.add_smithing_xp(20)
-                else:
-                    print("Inventory full! Cannot smelt Bronze Bar.")
-                    # Return the ores to inventory
-                    self.inventory.items[copper_slot] = copper_ore
-                    self.inventory.items[tin_slot] = tin_ore
-            else:
-                print("Need 1 Copper Ore and 1 Tin Ore to smelt Bronze Bar")
-    
-    def get_facing_tile(self):
-        target_x = self.grid_x
-        target_y = self.grid_y
-        
-        if self.direction == 'right':
-            target_x += 1
-        elif self.direction == 'left':
-            target_x -= 1
-        elif self.direction == 'up':
-            target_y -= 1
-        elif self.direction == 'down':
-            target_y += 1
-            
-        return target_x, target_y 
\ No newline at end of file
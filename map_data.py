@@ -1,48 +1,357 @@
+import ast
 import json
-from tile_types import TileTypes
+import struct
+import numpy as np
+from tile_types import TileTypes, RockTypes
 from items import ItemRegistry
+from game_log import get_logger
 import os
 
+log = get_logger("map")
+
+# Which tile values are restored when the map resets
+RESETTABLE_TILES = TileTypes.lookup_table('resettable')
+
+# Binary map format (little endian):
+#   header, rock name table, item table, padding,
+#   tile plane (height x width uint8), rock plane (height x width uint8, 0 = no rock)
+BINARY_EXTENSION = ".bmap"
+BINARY_MAGIC = b"MOMP"
+BINARY_VERSION = 1
+# magic, version, width, height, spawn x, spawn y, rock name count, item count, plane offset
+BINARY_HEADER = struct.Struct("<4sHIIiiHII")
+# x, y, item name length (name bytes follow)
+BINARY_ITEM = struct.Struct("<IIH")
+BINARY_PLANE_ALIGNMENT = 16
+
+def parse_position(pos):
+    """Accept both (x, y) tuples and "(x, y)" strings as used in map files"""
+    if isinstance(pos, str):
+        pos = ast.literal_eval(pos)
+    return tuple(pos)
+
 class Map:
+    # Maps are split into square chunks of tiles for rendering and caching.
+    # At 50px tiles a 16 tile chunk is an 800x800 surface.
+    CHUNK_SIZE = 16
+    
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.tiles = [[TileTypes.WALL for x in range(width)] for y in range(height)]
+        # tiles[y][x] (or tiles[y, x]) - one byte per tile
+        self.tiles = np.full((height, width), TileTypes.WALL, dtype=np.uint8)
+        # rocks[y, x] - RockTypes id of each rock tile, 0 for none (see RockTypes.by_id)
+        self.rocks = np.zeros((height, width), dtype=np.uint8)
         self.items = {}  # Current items on ground
+        self.item_chunks = {}  # (chunk_x, chunk_y) -> positions with items, for area queries
         self.initial_items = {}  # Initial item positions
-        self.initial_rock_data = {}  # Initial rock states
+        self.initial_rocks = self.rocks.copy()  # Initial rock types
         self.player_spawn = (1, 1)
+        self.tile_listeners = []  # Callbacks told about tile changes
+        
+        # What changed since the last snapshot, so resets only touch those
+        self.modified_positions = set()  # (x, y) of single tile changes
+        self.modified_regions = []  # (x, y, width, height) of bulk tile changes
+        self.modified_item_positions = set()
+        
+    def add_tile_listener(self, callback):
+        """Register callback(x, y, width, height) to be told when tiles change"""
+        self.tile_listeners.append(callback)
+        
+    def remove_tile_listener(self, callback):
+        if callback in self.tile_listeners:
+            self.tile_listeners.remove(callback)
+            
+    def notify_tiles_changed(self, x, y, width=1, height=1):
+        """Tell listeners that a rectangle of tiles needs to be redrawn"""
+        for callback in self.tile_listeners:
+            callback(x, y, width, height)
+            
+    def chunk_count(self):
+        """Number of chunks across and down (edge chunks may be partial)"""
+        return (-(-self.width // self.CHUNK_SIZE), -(-self.height // self.CHUNK_SIZE))
+        
+    def chunk_bounds(self, chunk_x, chunk_y):
+        """Tile rectangle (x, y, width, height) covered by a chunk"""
+        x = chunk_x * self.CHUNK_SIZE
+        y = chunk_y * self.CHUNK_SIZE
+        return (x, y, min(self.CHUNK_SIZE, self.width - x), min(self.CHUNK_SIZE, self.height - y))
+        
+    def chunks_in_rect(self, x, y, width, height):
+        """Yield (chunk_x, chunk_y) for every chunk overlapping a tile rectangle"""
+        chunks_x, chunks_y = self.chunk_count()
+        first_x = max(0, x // self.CHUNK_SIZE)
+        first_y = max(0, y // self.CHUNK_SIZE)
+        last_x = min(chunks_x - 1, (x + width - 1) // self.CHUNK_SIZE)
+        last_y = min(chunks_y - 1, (y + height - 1) // self.CHUNK_SIZE)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                yield chunk_x, chunk_y
+        
+    def set_tile(self, x, y, tile):
+        """Change a single tile and notify listeners if it actually changed"""
+        if self.tiles[y, x] != tile:
+            self.tiles[y, x] = tile
+            self.modified_positions.add((x, y))
+            self.notify_tiles_changed(x, y)
+            
+    def rock_type_at(self, x, y):
+        """The RockTypes entry stored for a tile, or None"""
+        return RockTypes.by_id(self.rocks[y, x])
+        
+    def set_rock_type(self, x, y, rock_type):
+        """Store a RockTypes entry (None to clear) for a tile"""
+        rock_id = RockTypes.id_of(rock_type)
+        if self.rocks[y, x] != rock_id:
+            self.rocks[y, x] = rock_id
+            self.modified_positions.add((x, y))
+            # Rock colour can change even when the tile type doesn't
+            self.notify_tiles_changed(x, y)
+            
+    def put_tiles(self, indices, tiles, rocks=None):
+        """
+        Write tiles, and optionally rock ids, at flat y * width + x indices
+        as one change. Listeners are told about the bounding rectangle once.
+        """
+        if len(indices) == 0:
+            return
+        np.put(self.tiles, indices, tiles)
+        if rocks is not None:
+            np.put(self.rocks, indices, rocks)
+        ys, xs = np.divmod(np.asarray(indices, np.int64), self.width)
+        x, y = int(xs.min()), int(ys.min())
+        region = (x, y, int(xs.max()) - x + 1, int(ys.max()) - y + 1)
+        self.modified_regions.append(region)
+        self.notify_tiles_changed(*region)
+            
+    def fill_region(self, x, y, width, height, tile, rock_id=None):
+        """
+        Set every tile in a rectangle, clipped to the map, and optionally its
+        rock ids, as one slice write. Cheaper than put_tiles for rectangles,
+        which don't need an index per tile.
+        """
+        start_x, start_y = max(0, x), max(0, y)
+        end_x = min(self.width, x + width)
+        end_y = min(self.height, y + height)
+        if start_x >= end_x or start_y >= end_y:
+            return
+        self.tiles[start_y:end_y, start_x:end_x] = tile
+        if rock_id is not None:
+            self.rocks[start_y:end_y, start_x:end_x] = rock_id
+        region = (start_x, start_y, end_x - start_x, end_y - start_y)
+        self.modified_regions.append(region)
+        self.notify_tiles_changed(*region)
+        
+    def _store_items(self, pos, items):
+        """Write the items at pos, keeping the chunk index in step"""
+        chunk = (pos[0] // self.CHUNK_SIZE, pos[1] // self.CHUNK_SIZE)
+        if items:
+            self.items[pos] = items
+            self.item_chunks.setdefault(chunk, set()).add(pos)
+        else:
+            self.items.pop(pos, None)
+            positions = self.item_chunks.get(chunk)
+            if positions is not None:
+                positions.discard(pos)
+                if not positions:
+                    del self.item_chunks[chunk]
+        
+    def place_item(self, pos, item):
+        """Drop an item on top of the stack at pos"""
+        items = self.items.get(pos)
+        if items is None:
+            self._store_items(pos, [item])
+        elif isinstance(items, list):
+            items.append(item)
+        else:
+            # Single item (old format)
+            self._store_items(pos, [items, item])
+        self.modified_item_positions.add(pos)
+        
+    def set_items(self, pos, items):
+        """Replace whatever lies at pos. None or an empty list clears it."""
+        self._store_items(pos, items)
+        self.modified_item_positions.add(pos)
+        
+    def items_at(self, x, y):
+        """The stack of items on a tile as a list, bottom first (empty if none)"""
+        items = self.items.get((x, y))
+        if items is None:
+            return []
+        # Handle old format (single item)
+        return items if isinstance(items, list) else [items]
+        
+    def items_in_rect(self, x, y, width, height):
+        """Yield (pos, items) for every item stack inside a tile rectangle"""
+        for chunk in self.chunks_in_rect(x, y, width, height):
+            for pos in self.item_chunks.get(chunk, ()):
+                if x <= pos[0] < x + width and y <= pos[1] < y + height:
+                    yield pos, self.items_at(*pos)
+        
+    def _restore_modified_tiles(self):
+        """
+        Put modified resettable tiles back to their initial values.
+        Returns the restored positions as a list of (x, y).
+        """
+        restored = []
+        for x, y in self.modified_positions:
+            tile = self.tiles[y, x]
+            initial_tile = self.initial_tiles[y, x]
+            if tile != initial_tile and RESETTABLE_TILES[tile]:
+                self.tiles[y, x] = initial_tile
+                self.notify_tiles_changed(x, y)
+                restored.append((x, y))
+        
+        for x, y, width, height in self.modified_regions:
+            block = self.tiles[y:y + height, x:x + width]
+            initial_block = self.initial_tiles[y:y + height, x:x + width]
+            changed = RESETTABLE_TILES[block] & (block != initial_block)
+            if changed.any():
+                block[changed] = initial_block[changed]
+                self.notify_tiles_changed(x, y, width, height)
+                ys, xs = np.nonzero(changed)
+                restored.extend(zip((xs + x).tolist(), (ys + y).tolist()))
+        
+        # Keep tracking whatever still differs (e.g. mined walls)
+        self.modified_positions = {
+            (x, y) for x, y in self.modified_positions
+            if self.tiles[y, x] != self.initial_tiles[y, x]
+        }
+        self.modified_regions = [
+            (x, y, width, height) for x, y, width, height in self.modified_regions
+            if (self.tiles[y:y + height, x:x + width] !=
+                self.initial_tiles[y:y + height, x:x + width]).any()
+        ]
+        return restored
+        
+    def resized(self, new_width, new_height):
+        """Return a copy of this map cropped or padded (with walls) to a new size"""
+        new_map = Map(new_width, new_height)
+        
+        # Copy the overlapping block of tiles in one go
+        copy_width = min(new_width, self.width)
+        copy_height = min(new_height, self.height)
+        new_map.tiles[:copy_height, :copy_width] = self.tiles[:copy_height, :copy_width]
+        new_map.rocks[:copy_height, :copy_width] = self.rocks[:copy_height, :copy_width]
+        
+        # Copy items that are within new bounds
+        for pos, item in self.items.items():
+            x, y = pos
+            if x < new_width and y < new_height:
+                new_map._store_items(pos, item)
+                
+        # Ensure spawn point is within new bounds
+        spawn_x, spawn_y = self.player_spawn
+        new_map.player_spawn = (
+            min(spawn_x, new_width - 1),
+            min(spawn_y, new_height - 1)
+        )
+        return new_map
         
     @classmethod
-    def load_from_file(cls, filename):
-        """Load map from file"""
-        with open(f"maps/{filename}.json", 'r') as f:
+    def load_from_file(cls, filename, file_format=None):
+        """
+        Load map from file. file_format is 'json' or 'binary'; by default the
+        binary map is used when it is at least as new as the JSON one.
+        """
+        if file_format is None:
+            file_format = cls.newest_file_format(filename)
+            
+        if file_format == 'binary':
+            map_instance = cls._load_binary(f"maps/{filename}{BINARY_EXTENSION}")
+        else:
+            map_instance = cls._load_json(f"maps/{filename}.json")
+        
+        log.info("Loaded %s map %s: %dx%d, %d item stacks", file_format, filename,
+                 map_instance.width, map_instance.height, len(map_instance.items))
+        log.debug("Items loaded: %s", map_instance.items)
+        
+        # Save initial state
+        map_instance.save_initial_state()
+        return map_instance
+        
+    @staticmethod
+    def newest_file_format(filename):
+        """Pick the binary map if it exists and isn't older than the JSON map"""
+        json_path = f"maps/{filename}.json"
+        binary_path = f"maps/{filename}{BINARY_EXTENSION}"
+        if os.path.exists(binary_path):
+            if (not os.path.exists(json_path) or
+                    os.path.getmtime(binary_path) >= os.path.getmtime(json_path)):
+                return 'binary'
+        return 'json'
+        
+    @classmethod
+    def _load_json(cls, path):
+        with open(path, 'r') as f:
             data = json.load(f)
             
         map_instance = cls(data['width'], data['height'])
-        map_instance.tiles = data['tiles']
+        map_instance.tiles = np.array(data['tiles'], dtype=np.uint8)
         
         # Load items
         for pos_str, item_name in data['items'].items():
-            # Convert string position to tuple
-            pos = eval(pos_str)  # Safely converts "(x, y)" to (x, y)
-            map_instance.items[pos] = ItemRegistry.create_item(item_name)
+            map_instance._store_items(parse_position(pos_str), ItemRegistry.create_item(item_name))
         
         # Load other data
         map_instance.player_spawn = tuple(data['player_spawn'])
-        TileTypes.rock_data = data['rock_data']
+        for pos_str, rock_type in data.get('rock_data', {}).items():
+            x, y = parse_position(pos_str)
+            map_instance.rocks[y, x] = RockTypes.id_of(rock_type)
+        return map_instance
         
-        print("Map loaded from file")  # Debug print
-        print("Initial items loaded:", map_instance.items)  # Debug print
+    @classmethod
+    def _load_binary(cls, path):
+        with open(path, 'rb') as f:
+            (magic, version, width, height, spawn_x, spawn_y,
+             rock_count, item_count, plane_offset) = BINARY_HEADER.unpack(f.read(BINARY_HEADER.size))
+            if magic != BINARY_MAGIC:
+                raise ValueError(f"{path} is not a binary map")
+            if version != BINARY_VERSION:
+                raise ValueError(f"Unsupported binary map version: {version}")
+                
+            rock_names = []
+            for _ in range(rock_count):
+                name_length = f.read(1)[0]
+                rock_names.append(f.read(name_length).decode('ascii'))
+                
+            items = []
+            for _ in range(item_count):
+                x, y, name_length = BINARY_ITEM.unpack(f.read(BINARY_ITEM.size))
+                items.append(((x, y), f.read(name_length).decode('utf-8')))
         
-        # Save initial state
-        map_instance.save_initial_state()
+        map_instance = cls(width, height)
+        map_instance.player_spawn = (spawn_x, spawn_y)
+        for pos, item_name in items:
+            map_instance._store_items(pos, ItemRegistry.create_item(item_name))
+        
+        # Map both planes straight from the file. Copy-on-write lets the game
+        # change tiles without ever writing back to the map file.
+        planes = np.memmap(path, dtype=np.uint8, mode='c',
+                           offset=plane_offset, shape=(2, height, width))
+        map_instance.tiles = planes[0]
+        
+        # Translate the file's rock ids to ours with a lookup table, unknown names become 0
+        file_ids = [0] + [RockTypes.id_of(getattr(RockTypes, name, None)) for name in rock_names]
+        remap = np.zeros(256, dtype=np.uint8)
+        remap[:len(file_ids)] = file_ids
+        if np.array_equal(remap[:len(file_ids)], np.arange(len(file_ids))):
+            map_instance.rocks = planes[1]  # Same numbering, use the mapped plane as is
+        else:
+            map_instance.rocks = remap[planes[1]]
         return map_instance
         
-    def save_to_file(self, filename):
+    def save_to_file(self, filename, file_format='json'):
+        """Save map as 'json' (interchange format) or 'binary'"""
         # Create maps directory if it doesn't exist
         os.makedirs("maps", exist_ok=True)
         
+        if file_format == 'binary':
+            self._save_binary(f"maps/{filename}{BINARY_EXTENSION}")
+        else:
+            self._save_json(f"maps/{filename}.json")
+            
+    def _save_json(self, path):
         # Convert items dictionary to serializable format
         items_data = {}
         for pos, item in self.items.items():
@@ -50,61 +359,92 @@ class Map:
             
         # Save rock data
         rock_data = {}
-        for pos, rock_type in TileTypes.rock_data.items():
-            rock_data[str(pos)] = rock_type
+        ys, xs = np.nonzero(self.rocks)
+        for x, y, rock_id in zip(xs.tolist(), ys.tolist(), self.rocks[ys, xs].tolist()):
+            rock_data[str((x, y))] = RockTypes.by_id(rock_id)
             
         data = {
             'width': self.width,
             'height': self.height,
-            'tiles': self.tiles,
+            'tiles': self.tiles.tolist(),
             'items': items_data,
             'player_spawn': list(self.player_spawn),
             'rock_data': rock_data  # Add rock data to save file
         }
         
-        with open(f"maps/{filename}.json", "w") as f:
-            json.dump(data, f, indent=2) 
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+            
+    def _save_binary(self, path):
+        # The rock plane is written as is, with names in RockTypes id order
+        all_rocks = RockTypes.get_all_rocks()
+        name_table = b"".join(bytes([len(name)]) + name.encode('ascii') for name in all_rocks)
+        item_entries = []
+        for (x, y), item in self.items.items():
+            item_name = item.name.encode('utf-8')
+            item_entries.append(BINARY_ITEM.pack(x, y, len(item_name)) + item_name)
+        item_table = b"".join(item_entries)
+        
+        # Align the planes so they can be memory-mapped efficiently
+        table_end = BINARY_HEADER.size + len(name_table) + len(item_table)
+        plane_offset = -(-table_end // BINARY_PLANE_ALIGNMENT) * BINARY_PLANE_ALIGNMENT
+        header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.width, self.height,
+                                    self.player_spawn[0], self.player_spawn[1],
+                                    len(all_rocks), len(self.items), plane_offset)
+        
+        # Write to a temporary file first, the current tiles may be mapped from path
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(name_table)
+            f.write(item_table)
+            f.write(bytes(plane_offset - table_end))
+            f.write(np.ascontiguousarray(self.tiles, dtype=np.uint8).tobytes())
+            f.write(np.ascontiguousarray(self.rocks, dtype=np.uint8).tobytes())
+        os.replace(temp_path, path)
 
     def save_initial_state(self):
         """Save the initial state of resettable elements"""
         # Save initial tile state
-        self.initial_tiles = [[tile for tile in row] for row in self.tiles]
+        self.initial_tiles = self.tiles.copy()
         
-        # Save initial rock data
-        self.initial_rock_data = {}
-        for pos, data in TileTypes.rock_data.items():
-            self.initial_rock_data[pos] = data
+        # Save initial rock types
+        self.initial_rocks = self.rocks.copy()
         
         # Save initial item positions and types
         self.initial_items = {}
         for pos, item in self.items.items():
             self.initial_items[pos] = item.name
-        print("Initial state saved:")  # Debug print
-        print("Initial items:", self.initial_items)  # Debug print
+            
+        # Nothing has been modified relative to the new snapshot
+        self.modified_positions = set()
+        self.modified_regions = []
+        self.modified_item_positions = set()
+        log.debug("Initial state saved, items: %s", self.initial_items)
 
     def reset_map(self):
-        """Reset resettable elements to their initial state"""
-        print("Resetting map...")  # Debug print
-        print("Initial items to restore:", self.initial_items)  # Debug print
-        
-        # Reset tiles that are marked as resettable
-        for y in range(self.height):
-            for x in range(self.width):
-                tile_props = TileTypes.get_tile_properties(self.tiles[y][x])
-                if tile_props.get('resettable', False):
-                    self.tiles[y][x] = self.initial_tiles[y][x]
-                    # If this was originally a rock, restore its data
-                    if (x, y) in self.initial_rock_data:
-                        TileTypes.rock_data[(x, y)] = self.initial_rock_data[(x, y)]
-        
-        # COMPLETELY RECREATE ALL INITIAL ITEMS
-        # First, clear all current items
-        self.items.clear()
-        # Then spawn new instances of all initial items
-        for pos, item_name in self.initial_items.items():
-            new_item = ItemRegistry.create_item(item_name)
-            self.items[pos] = new_item
-            print(f"Respawned {item_name} at position {pos}")  # Debug print
-        
-        print("Current items after reset:", self.items)  # Debug print
-        return True 
\ No newline at end of file
+        """
+        Reset resettable elements to their initial state. Only positions
+        modified since the last snapshot are visited.
+        """
+        log.info("Resetting %d tiles, %d tile regions and %d item positions",
+                 len(self.modified_positions), len(self.modified_regions), len(self.modified_item_positions))
+        
+        # Reset tiles that are marked as resettable, along with their rock types
+        restored = self._restore_modified_tiles()
+        if restored:
+            xs, ys = np.array(restored).T
+            self.rocks[ys, xs] = self.initial_rocks[ys, xs]
+        
+        # Recreate the initial items wherever items were picked up or dropped
+        for pos in self.modified_item_positions:
+            item_name = self.initial_items.get(pos)
+            if item_name:
+                self._store_items(pos, ItemRegistry.create_item(item_name))
+                log.debug("Respawned %s at %s", item_name, pos)
+            else:
+                self._store_items(pos, None)
+        self.modified_item_positions = set()
+        
+        log.debug("Items after reset: %s", self.items)
+        return True
@@ -1,11 +1,17 @@
 import pygame
 import os
+import numpy as np
 from tkinter import filedialog
 import tkinter as tk
-from map_data import Map
+from map_data import Map, BINARY_EXTENSION
+from map_renderer import MapRenderer
 from tile_types import TileTypes, RockTypes
 from items import ItemRegistry
 from sidebar import Sidebar
+from text_cache import TextCache
+from edit_history import EditHistory
+from map_tools import flood_fill_indices, rect_bounds, rect_indices, line_indices
+import game_log
 
 class MapEditor:
     def __init__(self):
@@ -33,10 +39,21 @@ class MapEditor:
         # Initialize map
         self.current_map = Map(self.MAP_WIDTH, self.MAP_HEIGHT)
         
+        # Undo/redo, each mouse press to release is one command
+        self.history = EditHistory(self.current_map)
+        
+        # Pre-rendered map layer, patched only where edits change tiles, and
+        # the tile grid drawn over it, rebuilt only when the map size changes
+        self.GRID_COLOR = (50, 50, 50)
+        self.map_renderer = MapRenderer(self.current_map, self.TILE_SIZE)
+        self.grid_overlay = self.build_grid_overlay()
+        
         # Camera position (in tile coordinates)
         self.camera_x = 0
         self.camera_y = 0
         self.CAMERA_SPEED = 1  # Tiles per keypress
+        self.CAMERA_REPEAT_DELAY = 100  # Milliseconds between moves while an arrow key is held
+        self.CAMERA_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
         
         # Editor state
         self.selected_category = "Tiles"
@@ -44,6 +61,14 @@ class MapEditor:
         self.selected_item = None
         self.selected_rock_type = None
         
+        # Painting tools, picked with the number keys. Rectangles and lines
+        # are dragged out from drag_start and painted on release.
+        self.TOOL_KEYS = {pygame.K_1: "Brush", pygame.K_2: "Fill", pygame.K_3: "Rectangle",
+                          pygame.K_4: "Outline", pygame.K_5: "Line"}
+        self.tool = "Brush"
+        self.drag_start = None
+        self.stroke_tile = None  # Last tile painted while dragging the brush
+        
         # UI colors
         self.BUTTON_COLOR = (70, 70, 70)
         self.BUTTON_HOVER_COLOR = (90, 90, 90)
@@ -55,6 +80,7 @@ class MapEditor:
         # Create save/load message
         self.message = ""
         self.message_timer = 0
+        self.message_surface = None  # Rendered once when the message is shown
         
         # Add scroll offset for sidebar
         self.sidebar_scroll = 0
@@ -72,8 +98,23 @@ class MapEditor:
     def show_message(self, text, duration=2000):
         self.message = text
         self.message_timer = pygame.time.get_ticks() + duration
+        self.message_surface = TextCache.get_font(24).render(text, True, (255, 255, 255))
+    
+    def expire_message(self):
+        """Clear the message once its time is up, returning whether it was cleared"""
+        if not self.message or pygame.time.get_ticks() < self.message_timer:
+            return False
+        self.message = ""
+        self.message_surface = None
+        return True
+    
+    def draw_message(self):
+        if self.message_surface:
+            self.screen.blit(self.message_surface, (10, 10))
         
     def handle_camera_movement(self, keys):
+        """Scroll the camera for any held arrow keys, returning whether it moved"""
+        old_camera = (self.camera_x, self.camera_y)
         if keys[pygame.K_LEFT]:
             self.camera_x = max(0, self.camera_x - self.CAMERA_SPEED)
         if keys[pygame.K_RIGHT]:
@@ -82,6 +123,7 @@ class MapEditor:
             self.camera_y = max(0, self.camera_y - self.CAMERA_SPEED)
         if keys[pygame.K_DOWN]:
             self.camera_y = min(self.MAP_HEIGHT - self.VIEWPORT_HEIGHT, self.camera_y + self.CAMERA_SPEED)
+        return (self.camera_x, self.camera_y) != old_camera
     
     def world_to_screen(self, grid_x, grid_y):
         """Convert world coordinates to screen coordinates"""
@@ -95,32 +137,29 @@ class MapEditor:
         grid_y = screen_y // self.TILE_SIZE + self.camera_y
         return grid_x, grid_y
         
-    def resize_map(self, new_width, new_height):
-        # Create new map with desired size
-        new_map = Map(new_width, new_height)
-        
-        # Copy existing tiles and items where possible
-        for y in range(min(new_height, self.MAP_HEIGHT)):
-            for x in range(min(new_width, self.MAP_WIDTH)):
-                new_map.tiles[y][x] = self.current_map.tiles[y][x]
-                
-        # Copy items that are within new bounds
-        for pos, item in self.current_map.items.items():
-            x, y = pos
-            if x < new_width and y < new_height:
-                new_map.items[pos] = item
-                
-        # Ensure spawn point is within new bounds
-        spawn_x, spawn_y = self.current_map.player_spawn
-        new_map.player_spawn = (
-            min(spawn_x, new_width - 1),
-            min(spawn_y, new_height - 1)
-        )
+    def set_map(self, game_map):
+        """Switch to a different map, e.g. after loading or resizing"""
+        self.current_map = game_map
+        self.MAP_WIDTH = game_map.width
+        self.MAP_HEIGHT = game_map.height
+        self.history.set_map(game_map)
+        self.map_renderer.set_map(game_map)
+        self.grid_overlay = self.build_grid_overlay()
+        
+    def build_grid_overlay(self):
+        """A transparent surface with the outline of every visible tile"""
+        width = min(self.VIEWPORT_WIDTH, self.MAP_WIDTH) * self.TILE_SIZE
+        height = min(self.VIEWPORT_HEIGHT, self.MAP_HEIGHT) * self.TILE_SIZE
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        for screen_y in range(0, height, self.TILE_SIZE):
+            for screen_x in range(0, width, self.TILE_SIZE):
+                pygame.draw.rect(overlay, self.GRID_COLOR,
+                               (screen_x, screen_y, self.TILE_SIZE, self.TILE_SIZE), 1)
+        return overlay
         
-        # Update map
-        self.current_map = new_map
-        self.MAP_WIDTH = new_width
-        self.MAP_HEIGHT = new_height
+    def resize_map(self, new_width, new_height):
+        # Copy existing tiles, items and spawn into a map of the new size
+        self.set_map(self.current_map.resized(new_width, new_height))
         
         # Reset camera if it's out of bounds
         self.camera_x = min(self.camera_x, self.MAP_WIDTH - self.VIEWPORT_WIDTH)
@@ -132,27 +171,26 @@ class MapEditor:
                         (self.VIEWPORT_WIDTH * self.TILE_SIZE, 0,
                          self.SIDEBAR_WIDTH, self.VIEWPORT_HEIGHT * self.TILE_SIZE))
         
-        font = pygame.font.Font(None, 24)
         y = 10 - self.sidebar_scroll  # Apply scroll offset
         
         # Draw map dimensions and controls
         if y + 25 > 0:  # Only draw if visible
-            text = font.render(f"Map Size: {self.MAP_WIDTH}x{self.MAP_HEIGHT}", True, (255, 255, 255))
+            text = TextCache.render(f"Map Size: {self.MAP_WIDTH}x{self.MAP_HEIGHT}", 24)
             self.screen.blit(text, (self.VIEWPORT_WIDTH * self.TILE_SIZE + 10, y))
         y += 25
         
         if y + 25 > 0:
-            text = font.render("R to resize map", True, (255, 255, 255))
+            text = TextCache.render("R to resize map", 24)
             self.screen.blit(text, (self.VIEWPORT_WIDTH * self.TILE_SIZE + 10, y))
         y += 25
         
         if y + 25 > 0:
-            text = font.render("Ctrl+S to Save", True, (255, 255, 255))
+            text = TextCache.render("Ctrl+S to Save", 24)
             self.screen.blit(text, (self.VIEWPORT_WIDTH * self.TILE_SIZE + 10, y))
         y += 25
         
         if y + 25 > 0:
-            text = font.render("Ctrl+L to Load", True, (255, 255, 255))
+            text = TextCache.render("Ctrl+L to Load", 24)
             self.screen.blit(text, (self.VIEWPORT_WIDTH * self.TILE_SIZE + 10, y))
         y += 40
         
@@ -163,7 +201,7 @@ class MapEditor:
                 button_rect = pygame.Rect(self.VIEWPORT_WIDTH * self.TILE_SIZE + 10, y, 180, 30)
                 pygame.draw.rect(self.screen, color, button_rect)
                 
-                text = font.render(category, True, (255, 255, 255))
+                text = TextCache.render(category, 24)
                 self.screen.blit(text, (button_rect.x + 10, button_rect.y + 5))
             y += 40
         
@@ -180,7 +218,7 @@ class MapEditor:
                     pygame.draw.rect(self.screen, color, button_rect)
                     
                     props = TileTypes.get_tile_properties(tile_type)
-                    text = font.render(props['name'], True, (255, 255, 255))
+                    text = TextCache.render(props['name'], 24)
                     self.screen.blit(text, (button_rect.x + 10, button_rect.y + 5))
                 y += 40
             
@@ -193,7 +231,7 @@ class MapEditor:
                             color = self.SELECTED_COLOR if self.selected_rock_type == rock_data else self.BUTTON_COLOR
                             pygame.draw.rect(self.screen, color, button_rect)
                             
-                            text = font.render(rock_data['name'], True, (255, 255, 255))
+                            text = TextCache.render(rock_data['name'], 24)
                             self.screen.blit(text, (button_rect.x + 10, button_rect.y + 5))
                         y += 40
         
@@ -205,7 +243,7 @@ class MapEditor:
                     color = self.SELECTED_COLOR if item_name == self.selected_item else item.icon_color
                     pygame.draw.rect(self.screen, color, button_rect)
                     
-                    text = font.render(item.name, True, (255, 255, 255))
+                    text = TextCache.render(item.name, 24)
                     self.screen.blit(text, (button_rect.x + 40, button_rect.y + 5))
                 y += 40
         
@@ -290,14 +328,117 @@ class MapEditor:
             0 <= tile_y < len(self.current_map.tiles)):
             
             if self.sidebar.selected_tile is not None:
-                self.current_map.tiles[tile_y][tile_x] = self.sidebar.selected_tile
+                self.history.touch(tile_x, tile_y)
                 if self.sidebar.selected_rock_type:
-                    rock_data = getattr(RockTypes, self.sidebar.selected_rock_type)
-                    TileTypes.rock_data[(tile_x, tile_y)] = rock_data.copy()
+                    rock_type = getattr(RockTypes, self.sidebar.selected_rock_type)
+                    self.current_map.set_rock_type(tile_x, tile_y, rock_type)
+                elif self.sidebar.selected_tile != TileTypes.ROCK:
+                    # Don't leave a rock type behind under other tiles
+                    self.current_map.set_rock_type(tile_x, tile_y, None)
+                self.current_map.set_tile(tile_x, tile_y, self.sidebar.selected_tile)
             elif self.sidebar.selected_item:
                 # Create the item and add it to the map
                 new_item = ItemRegistry.create_item(self.sidebar.selected_item)
-                self.current_map.items[(tile_x, tile_y)] = new_item
+                self.history.touch_items((tile_x, tile_y))
+                self.current_map.set_items((tile_x, tile_y), new_item)
+    
+    def selected_rock_id(self):
+        """Rock id to paint with the selected tile, or None to leave rock ids alone"""
+        if self.sidebar.selected_rock_type:
+            return RockTypes.id_of(getattr(RockTypes, self.sidebar.selected_rock_type))
+        if self.sidebar.selected_tile != TileTypes.ROCK:
+            return 0
+        return None  # Plain rock tiles keep whatever rock type they had
+    
+    def paint_tiles(self, indices):
+        """Paint the selected tile (and rock type) over flat tile indices as one batch"""
+        tile = self.sidebar.selected_tile
+        if tile is None or not len(indices):
+            return
+        self.history.touch_indices(indices)
+        self.current_map.put_tiles(indices, tile, self.selected_rock_id())
+    
+    def paint_rect(self, start, end):
+        """Fill the rectangle dragged from start to end with the selected tile as one slice write"""
+        tile = self.sidebar.selected_tile
+        x, y, width, height = rect_bounds(self.current_map, *start, *end)
+        if tile is None or not width or not height:
+            return
+        self.history.touch_region(x, y, width, height)
+        self.current_map.fill_region(x, y, width, height, tile, self.selected_rock_id())
+    
+    def shape_indices(self, start, end):
+        """Tiles covered by the rectangle or line tool dragged from start to end"""
+        if self.tool == "Line":
+            return line_indices(self.current_map, *start, *end)
+        return rect_indices(self.current_map, *start, *end, outline=self.tool == "Outline")
+    
+    def clamp_to_viewport(self, pos):
+        """Keep a dragged mouse position over the map view"""
+        return (max(0, min(pos[0], self.VIEWPORT_WIDTH * self.TILE_SIZE - 1)),
+                max(0, min(pos[1], self.VIEWPORT_HEIGHT * self.TILE_SIZE - 1)))
+    
+    def start_stroke(self, pos):
+        """Left button pressed on the map: everything until release is one undoable command"""
+        self.history.begin()
+        tile_x, tile_y = self.screen_to_world(*pos)
+        if self.tool == "Brush" or self.sidebar.selected_tile is None:
+            self.handle_click(pos)
+            if self.sidebar.selected_tile is not None:
+                self.stroke_tile = (tile_x, tile_y)
+        elif self.tool == "Fill":
+            self.paint_tiles(flood_fill_indices(self.current_map, tile_x, tile_y))
+        else:
+            self.drag_start = (tile_x, tile_y)
+    
+    def continue_stroke(self, positions):
+        """
+        Paint the brush along every mouse position since the last call. Gaps
+        between positions are filled with lines, and all of it is painted as
+        one batch however many motion events arrived.
+        """
+        if self.stroke_tile is None:
+            return
+        segments = []
+        for pos in positions:
+            tile = self.screen_to_world(*self.clamp_to_viewport(pos))
+            if tile != self.stroke_tile:
+                segments.append(line_indices(self.current_map, *self.stroke_tile, *tile))
+                self.stroke_tile = tile
+        if segments:
+            self.paint_tiles(np.unique(np.concatenate(segments)))
+    
+    def finish_stroke(self, pos):
+        self.stroke_tile = None
+        if self.drag_start:
+            end = self.screen_to_world(*pos)
+            if self.tool == "Rectangle":
+                self.paint_rect(self.drag_start, end)
+            else:
+                self.paint_tiles(self.shape_indices(self.drag_start, end))
+            self.drag_start = None
+        self.history.end()
+    
+    def draw_tool_preview(self):
+        """Outline the rectangle or line being dragged out"""
+        if not self.drag_start:
+            return
+        end = self.screen_to_world(*pygame.mouse.get_pos())
+        if self.tool == "Line":
+            half = self.TILE_SIZE // 2
+            start_x, start_y = self.world_to_screen(*self.drag_start)
+            end_x, end_y = self.world_to_screen(*end)
+            pygame.draw.line(self.screen, (255, 255, 0), (start_x + half, start_y + half),
+                             (end_x + half, end_y + half), 3)
+        else:
+            left, top = self.world_to_screen(min(self.drag_start[0], end[0]), min(self.drag_start[1], end[1]))
+            right, bottom = self.world_to_screen(max(self.drag_start[0], end[0]) + 1,
+                                                 max(self.drag_start[1], end[1]) + 1)
+            pygame.draw.rect(self.screen, (255, 255, 0), (left, top, right - left, bottom - top), 3)
+    
+    def draw_tool_name(self):
+        text = TextCache.render(f"Tool: {self.tool} (1-5)", 24)
+        self.screen.blit(text, (10, self.VIEWPORT_HEIGHT * self.TILE_SIZE - 25))
     
     def draw_map(self):
         # Calculate visible range
@@ -306,26 +447,15 @@ class MapEditor:
         end_x = min(start_x + self.VIEWPORT_WIDTH, self.MAP_WIDTH)
         end_y = min(start_y + self.VIEWPORT_HEIGHT, self.MAP_HEIGHT)
         
-        # Draw visible tiles
-        for y in range(start_y, end_y):
-            for x in range(start_x, end_x):
-                screen_x, screen_y = self.world_to_screen(x, y)
-                tile_type = self.current_map.tiles[y][x]
-                tile_props = TileTypes.get_tile_properties(tile_type)
-                
-                pygame.draw.rect(self.screen, tile_props['color'],
-                               (screen_x, screen_y, self.TILE_SIZE, self.TILE_SIZE))
-                
-                # Draw grid lines
-                pygame.draw.rect(self.screen, (50, 50, 50),
-                               (screen_x, screen_y, self.TILE_SIZE, self.TILE_SIZE), 1)
+        # Draw visible tiles from the cached map layer, then the grid on top
+        self.map_renderer.draw(self.screen, start_x, start_y, self.VIEWPORT_WIDTH, self.VIEWPORT_HEIGHT)
+        self.screen.blit(self.grid_overlay, self.world_to_screen(max(0, start_x), max(0, start_y)))
         
-        # Draw items
-        for pos, item in self.current_map.items.items():
-            x, y = pos
-            if start_x <= x < end_x and start_y <= y < end_y:
-                screen_x, screen_y = self.world_to_screen(x, y)
-                item.draw(self.screen, screen_x, screen_y, self.TILE_SIZE)
+        # Draw items, looking up only the visible ones
+        for pos, items in self.current_map.items_in_rect(start_x, start_y, self.VIEWPORT_WIDTH, self.VIEWPORT_HEIGHT):
+            screen_x, screen_y = self.world_to_screen(*pos)
+            # Draw the last item in the stack
+            items[-1].draw(self.screen, screen_x, screen_y, self.TILE_SIZE)
             
         # Draw player spawn point if visible
         spawn_x, spawn_y = self.current_map.player_spawn
@@ -335,6 +465,14 @@ class MapEditor:
                            (screen_x + 5, screen_y + 5,
                             self.TILE_SIZE - 10, self.TILE_SIZE - 10))
     
+    def undo(self):
+        if not self.history.undo():
+            self.show_message("Nothing to undo")
+            
+    def redo(self):
+        if not self.history.redo():
+            self.show_message("Nothing to redo")
+    
     def handle_input(self, event):
         if event.type == pygame.MOUSEWHEEL:
             # Scroll sidebar when mouse is over it
@@ -343,10 +481,39 @@ class MapEditor:
                 self.sidebar_scroll = max(0, min(self.max_scroll,
                     self.sidebar_scroll - event.y * 20))
     
+    def wait_for_events(self):
+        """
+        Block until there is input. While an arrow key is held, give up after
+        CAMERA_REPEAT_DELAY so the camera keeps scrolling, and while a message
+        is showing, give up when it's due to disappear.
+        """
+        timeouts = []
+        keys = pygame.key.get_pressed()
+        if any(keys[key] for key in self.CAMERA_KEYS):
+            timeouts.append(self.CAMERA_REPEAT_DELAY)
+        if self.message:
+            timeouts.append(max(1, self.message_timer - pygame.time.get_ticks()))
+        if timeouts:
+            event = pygame.event.wait(min(timeouts))
+        else:
+            event = pygame.event.wait()
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+    
     def run(self):
         running = True
+        needs_redraw = True  # Always draw the first frame
         while running:
-            for event in pygame.event.get():
+            # Nothing changes without input, so sleep until some arrives
+            events = pygame.event.get() if needs_redraw else self.wait_for_events()
+            
+            # Brush drags are painted once per batch of events, not per motion event
+            stroke_motion = []
+            for event in events:
+                # Handle input
+                self.handle_input(event)
+                
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -362,9 +529,30 @@ class MapEditor:
                             self.sidebar.handle_click(mouse_x, mouse_y)
                     # Handle map clicks
                     elif event.button == 1:
-                        self.handle_click(event.pos)
+                        self.start_stroke(event.pos)
+                elif event.type == pygame.MOUSEMOTION and self.stroke_tile is not None:
+                    if event.buttons[0]:
+                        stroke_motion.append(event.pos)
+                    else:
+                        # Released somewhere we didn't hear about, e.g. outside the window
+                        self.continue_stroke(stroke_motion)
+                        stroke_motion = []
+                        self.finish_stroke(event.pos)
+                elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    self.continue_stroke(stroke_motion + [event.pos])
+                    stroke_motion = []
+                    self.finish_stroke(event.pos)
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_s and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                    if event.key in self.TOOL_KEYS:
+                        self.tool = self.TOOL_KEYS[event.key]
+                    elif event.key == pygame.K_z and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                            self.redo()
+                        else:
+                            self.undo()
+                    elif event.key == pygame.K_y and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        self.redo()
+                    elif event.key == pygame.K_s and pygame.key.get_mods() & pygame.KMOD_CTRL:
                         try:
                             # Create maps directory if it doesn't exist
                             os.makedirs("maps", exist_ok=True)
@@ -374,15 +562,16 @@ class MapEditor:
                                 initialdir="maps",
                                 title="Save Map",
                                 defaultextension=".json",
-                                filetypes=[("JSON files", "*.json")]
+                                filetypes=[("JSON files", "*.json"),
+                                           ("Binary maps", f"*{BINARY_EXTENSION}")]
                             )
                             
                             if filename:  # Only save if filename was provided
-                                # Remove .json extension and maps/ prefix if present
-                                filename = os.path.basename(filename)
-                                filename = filename.replace('.json', '')
+                                # Remove extension and maps/ prefix if present
+                                filename, extension = os.path.splitext(os.path.basename(filename))
+                                file_format = 'binary' if extension == BINARY_EXTENSION else 'json'
                                 
-                                self.current_map.save_to_file(filename)
+                                self.current_map.save_to_file(filename, file_format)
                                 self.show_message(f"Map saved as '{filename}'!")
                             else:
                                 self.show_message("Save cancelled")
@@ -395,17 +584,17 @@ class MapEditor:
                             filename = filedialog.askopenfilename(
                                 initialdir="maps",
                                 title="Load Map",
-                                filetypes=[("JSON files", "*.json")]
+                                filetypes=[("Map files", f"*.json *{BINARY_EXTENSION}"),
+                                           ("JSON files", "*.json"),
+                                           ("Binary maps", f"*{BINARY_EXTENSION}")]
                             )
                             
                             if filename:  # Only load if filename was provided
-                                # Remove .json extension and maps/ prefix if present
-                                filename = os.path.basename(filename)
-                                filename = filename.replace('.json', '')
+                                # Remove extension and maps/ prefix if present
+                                filename, extension = os.path.splitext(os.path.basename(filename))
+                                file_format = 'binary' if extension == BINARY_EXTENSION else 'json'
                                 
-                                self.current_map = Map.load_from_file(filename)
-                                self.MAP_WIDTH = len(self.current_map.tiles[0])
-                                self.MAP_HEIGHT = len(self.current_map.tiles)
+                                self.set_map(Map.load_from_file(filename, file_format))
                                 self.show_message(f"Map '{filename}' loaded!")
                                 
                                 # Reset camera position when loading new map
@@ -453,24 +642,39 @@ class MapEditor:
                         except Exception as e:
                             self.show_message(f"Error resizing map: {str(e)}")
             
+            self.continue_stroke(stroke_motion)
+            
+            # Moving the mouse only changes the screen while dragging something out
+            if any(event.type != pygame.MOUSEMOTION for event in events) or (
+                    events and (self.drag_start or stroke_motion)):
+                needs_redraw = True
+            
             # Handle camera movement
             keys = pygame.key.get_pressed()
-            self.handle_camera_movement(keys)
+            if self.handle_camera_movement(keys):
+                needs_redraw = True
+            if self.expire_message():
+                needs_redraw = True
             
-            # Handle input
-            self.handle_input(event)
+            if not needs_redraw:
+                continue
             
             # Clear screen
             self.screen.fill((0, 0, 0))
             
             # Draw map and sidebar
             self.draw_map()
+            self.draw_tool_preview()
+            self.draw_tool_name()
+            self.draw_message()
             self.sidebar.draw(self.screen)
             
             pygame.display.flip()
+            needs_redraw = False
             
         pygame.quit()
 
 if __name__ == "__main__":
+    game_log.configure()  # Level from the GAME_LOG environment variable
     editor = MapEditor()
     editor.run() 
\ No newline at end of file
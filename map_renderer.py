@@ -0,0 +1,109 @@
+import pygame
+from collections import OrderedDict
+from tile_types import TileTypes
+
+class MapRenderer:
+    """
+    Draws a map from pre-rendered chunk surfaces. Chunks are rendered the first
+    time they come into view, only changed tiles are redrawn afterwards, and
+    chunks far from the camera are evicted from a bounded LRU cache.
+    """
+    def __init__(self, game_map, tile_size, cache_radius=1, max_cached_chunks=32):
+        self.tile_size = tile_size
+        self.cache_radius = cache_radius  # Chunks kept around the visible ones
+        self.max_cached_chunks = max_cached_chunks
+        self.map = None
+        self.chunk_surfaces = OrderedDict()  # (chunk_x, chunk_y) -> Surface, oldest first
+        self.dirty_regions = {}  # (chunk_x, chunk_y) -> [(x, y, width, height), ...]
+        self.set_map(game_map)
+
+    def set_map(self, game_map):
+        """Switch to a different map, dropping all cached chunks"""
+        if self.map is not None:
+            self.map.remove_tile_listener(self.invalidate)
+        self.map = game_map
+        self.map.add_tile_listener(self.invalidate)
+        self.invalidate_all()
+
+    def invalidate(self, x, y, width=1, height=1):
+        """Mark a rectangle of tiles to be re-rendered on the next draw"""
+        chunk_size = self.map.CHUNK_SIZE
+        for chunk in self.map.chunks_in_rect(x, y, width, height):
+            # Chunks that aren't cached will be rendered fresh anyway
+            if chunk not in self.chunk_surfaces:
+                continue
+            chunk_x, chunk_y, chunk_width, chunk_height = self.map.chunk_bounds(*chunk)
+            start_x = max(x, chunk_x)
+            start_y = max(y, chunk_y)
+            end_x = min(x + width, chunk_x + chunk_width)
+            end_y = min(y + height, chunk_y + chunk_height)
+            if (end_x - start_x) * (end_y - start_y) >= chunk_size * chunk_size:
+                # Whole chunk changed, cheaper to rebuild it when it's next drawn
+                del self.chunk_surfaces[chunk]
+                self.dirty_regions.pop(chunk, None)
+            else:
+                self.dirty_regions.setdefault(chunk, []).append(
+                    (start_x, start_y, end_x - start_x, end_y - start_y))
+
+    def invalidate_all(self):
+        self.chunk_surfaces.clear()
+        self.dirty_regions.clear()
+
+    def _render_tile(self, surface, x, y, origin_x, origin_y):
+        tile = self.map.tiles[y, x]
+        screen_x = (x - origin_x) * self.tile_size
+        screen_y = (y - origin_y) * self.tile_size
+
+        if TileTypes.get_properties(tile).has_image and tile in TileTypes.tile_images:
+            surface.blit(TileTypes.tile_images[tile], (screen_x, screen_y))
+        else:
+            color = TileTypes.get_tile_color(tile, self.map.rock_type_at(x, y))
+            pygame.draw.rect(surface, color,
+                           (screen_x, screen_y, self.tile_size, self.tile_size))
+
+    def _render_region(self, surface, origin_x, origin_y, x, y, width, height):
+        for tile_y in range(y, y + height):
+            for tile_x in range(x, x + width):
+                self._render_tile(surface, tile_x, tile_y, origin_x, origin_y)
+
+    def _get_chunk_surface(self, chunk):
+        """Return the up to date surface for a chunk, rendering it if needed"""
+        chunk_x, chunk_y, width, height = self.map.chunk_bounds(*chunk)
+        surface = self.chunk_surfaces.get(chunk)
+        if surface is None:
+            surface = pygame.Surface((width * self.tile_size, height * self.tile_size))
+            self._render_region(surface, chunk_x, chunk_y, chunk_x, chunk_y, width, height)
+            self.chunk_surfaces[chunk] = surface
+        else:
+            self.chunk_surfaces.move_to_end(chunk)
+            for region in self.dirty_regions.pop(chunk, ()):
+                self._render_region(surface, chunk_x, chunk_y, *region)
+        return surface
+
+    def _evict_chunks(self, camera_x, camera_y, viewport_width, viewport_height):
+        """Drop chunks outside the cache radius, then the oldest ones over the limit"""
+        chunk_size = self.map.CHUNK_SIZE
+        first_x = camera_x // chunk_size - self.cache_radius
+        first_y = camera_y // chunk_size - self.cache_radius
+        last_x = (camera_x + viewport_width - 1) // chunk_size + self.cache_radius
+        last_y = (camera_y + viewport_height - 1) // chunk_size + self.cache_radius
+
+        for chunk in list(self.chunk_surfaces):
+            chunk_x, chunk_y = chunk
+            if not (first_x <= chunk_x <= last_x and first_y <= chunk_y <= last_y):
+                del self.chunk_surfaces[chunk]
+                self.dirty_regions.pop(chunk, None)
+
+        while len(self.chunk_surfaces) > self.max_cached_chunks:
+            chunk, _ = self.chunk_surfaces.popitem(last=False)
+            self.dirty_regions.pop(chunk, None)
+
+    def draw(self, screen, camera_x, camera_y, viewport_width, viewport_height):
+        """Blit the visible chunks onto the screen"""
+        for chunk in self.map.chunks_in_rect(camera_x, camera_y, viewport_width, viewport_height):
+            surface = self._get_chunk_surface(chunk)
+            chunk_x, chunk_y, _, _ = self.map.chunk_bounds(*chunk)
+            screen.blit(surface, ((chunk_x - camera_x) * self.tile_size,
+                                  (chunk_y - camera_y) * self.tile_size))
+
+        self._evict_chunks(camera_x, camera_y, viewport_width, viewport_height)
@@ -0,0 +1,113 @@
+import numpy as np
+from tile_types import TileTypes
+
+SCANLINE_CHECK_SPANS = 1024  # Spans filled before checking how well the scanline fill is doing
+SCANLINE_MIN_SPAN = 8  # Switch to ring filling when spans average fewer tiles than this
+
+# Editor painting shapes. Each returns the flat y * width + x indices of the
+# tiles it covers as one int64 array, ready for Map.put_tiles, so a shape is
+# written and redrawn as a single batch however many tiles it covers.
+
+def line_points(x0, y0, x1, y1):
+    """Bresenham line from (x0, y0) to (x1, y1), both ends included, as (xs, ys) lists"""
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    error = dx + dy
+    xs, ys = [], []
+    while True:
+        xs.append(x0)
+        ys.append(y0)
+        if x0 == x1 and y0 == y1:
+            return xs, ys
+        doubled = 2 * error
+        if doubled >= dy:
+            error += dy
+            x0 += step_x
+        if doubled <= dx:
+            error += dx
+            y0 += step_y
+
+def line_indices(game_map, x0, y0, x1, y1):
+    xs, ys = line_points(x0, y0, x1, y1)
+    xs, ys = np.array(xs, np.int64), np.array(ys, np.int64)
+    inside = (xs >= 0) & (xs < game_map.width) & (ys >= 0) & (ys < game_map.height)
+    return ys[inside] * game_map.width + xs[inside]
+
+def rect_bounds(game_map, x0, y0, x1, y1):
+    """(x, y, width, height) of the rectangle with corners (x0, y0) and (x1, y1), clipped to the map"""
+    left, right = max(0, min(x0, x1)), min(game_map.width - 1, max(x0, x1))
+    top, bottom = max(0, min(y0, y1)), min(game_map.height - 1, max(y0, y1))
+    return left, top, max(0, right - left + 1), max(0, bottom - top + 1)
+
+def rect_indices(game_map, x0, y0, x1, y1, outline=False):
+    """Tiles of the rectangle with corners (x0, y0) and (x1, y1), clipped to the map"""
+    left, top, width, height = rect_bounds(game_map, x0, y0, x1, y1)
+    if not width or not height:
+        return np.zeros(0, np.int64)
+    right, bottom = left + width - 1, top + height - 1
+    rows = np.arange(top, bottom + 1, dtype=np.int64)[:, None] * game_map.width
+    columns = np.arange(left, right + 1, dtype=np.int64)
+    if not outline:
+        return (rows + columns).ravel()
+    # Top and bottom rows plus the left and right columns between them
+    edges = [rows[0] + columns, rows[-1] + columns, rows[1:-1, 0] + left, rows[1:-1, 0] + right]
+    return np.unique(np.concatenate(edges))
+
+def flood_fill_indices(game_map, x, y):
+    """
+    Every tile connected to (x, y) through 4-way neighbours with the same
+    tile type, and for rocks the same rock type. Works a horizontal span at a time, so corridors
+    and open areas cost one step per row rather than one per tile. Ragged
+    areas where spans stay short switch to filling a whole ring of
+    neighbours per step instead.
+    """
+    if not (0 <= x < game_map.width and 0 <= y < game_map.height):
+        return np.zeros(0, np.int64)
+    match = game_map.tiles == game_map.tiles[y, x]
+    if game_map.tiles[y, x] == TileTypes.ROCK:
+        match &= game_map.rocks == game_map.rocks[y, x]
+    # Tiles that can still be filled, cleared as they're taken. The closed
+    # border means spans and neighbours never need bounds checks.
+    stride = game_map.width + 2
+    open_tiles = np.zeros((game_map.height + 2, stride), bool)
+    open_tiles[1:-1, 1:-1] = match
+
+    seeds = [(x + 1, y + 1)]
+    span_count = filled = 0
+    while seeds:
+        if span_count >= SCANLINE_CHECK_SPANS and filled < span_count * SCANLINE_MIN_SPAN:
+            _ring_fill(open_tiles, [seed_y * stride + seed_x for seed_x, seed_y in seeds])
+            break
+        seed_x, seed_y = seeds.pop()
+        row = open_tiles[seed_y]
+        if not row[seed_x]:
+            continue
+        # Extend the span left and right as far as the row stays open
+        end = seed_x + np.flatnonzero(~row[seed_x:])[0]
+        start = np.flatnonzero(~row[:seed_x])[-1] + 1
+        row[start:end] = False
+        span_count += 1
+        filled += end - start
+
+        # Seed every open run touching the span in the rows above and below
+        for next_y in (seed_y - 1, seed_y + 1):
+            neighbours = open_tiles[next_y, start:end]
+            run_starts = np.flatnonzero(neighbours & ~np.concatenate(([False], neighbours[:-1])))
+            seeds.extend((start + int(run_start), next_y) for run_start in run_starts)
+
+    return np.flatnonzero(match & ~open_tiles[1:-1, 1:-1])
+
+def _ring_fill(open_tiles, seeds):
+    """Breadth-first fill of a padded open_tiles grid from flat seed indices, a whole ring at a time"""
+    flat = open_tiles.ravel()
+    stride = open_tiles.shape[1]
+    offsets = np.array([-1, 1, -stride, stride])
+    frontier = np.unique(np.array(seeds, np.int64))
+    frontier = frontier[flat[frontier]]
+    flat[frontier] = False
+    while frontier.size:
+        neighbours = (frontier[:, None] + offsets).ravel()
+        frontier = np.unique(neighbours[flat[neighbours]])
+        flat[frontier] = False
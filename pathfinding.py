@@ -0,0 +1,142 @@
+import heapq
+import numpy as np
+from collections import OrderedDict
+from tile_types import TileTypes
+
+class WalkabilityGrid:
+    """
+    One byte per tile saying whether it can be walked on, stored row-major in
+    a flat bytearray. Built once from the map and then patched through the
+    map's tile listener, so only tiles that change are ever looked at again.
+    """
+    def __init__(self, game_map):
+        self.map = game_map
+        self.width = game_map.width
+        self.height = game_map.height
+        self.version = 0  # Bumped whenever any tile's walkability changes
+        self._walkable_table = TileTypes.lookup_table('walkable').astype(np.uint8)
+        self.cells = bytearray(self._walkable_table[game_map.tiles].tobytes())
+        # 2D view sharing memory with cells, for patching regions in one go
+        self._grid = np.frombuffer(self.cells, np.uint8).reshape(self.height, self.width)
+        game_map.add_tile_listener(self.on_tiles_changed)
+
+    def on_tiles_changed(self, x, y, width, height):
+        region = self._walkable_table[self.map.tiles[y:y + height, x:x + width]]
+        cells = self._grid[y:y + height, x:x + width]
+        # Most edits swap one walkable or blocked tile for another, e.g. mining
+        # a rock, and shouldn't throw away cached paths
+        if not np.array_equal(cells, region):
+            cells[...] = region
+            self.version += 1
+
+    def is_walkable(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] == 1
+
+class Pathfinder:
+    """
+    A* over a WalkabilityGrid with 4-way movement. Recent paths are cached
+    until the grid changes, and a path that gets blocked can be repaired
+    around the obstruction instead of being planned again from scratch.
+    """
+    MAX_CACHED_PATHS = 64
+    MAX_EXPANSIONS = 50000  # Give up on goals this far away or unreachable
+    REPAIR_EXPANSIONS = 2000  # Budget for detours before replanning fully
+
+    def __init__(self, grid):
+        self.grid = grid
+        self._cache = OrderedDict()  # (start, goal) -> path tuple
+        self._cache_version = grid.version
+
+    def find_path(self, start, goal, max_expansions=None):
+        """
+        Returns the list of tiles to step through to get from start to goal,
+        not including start, or None if there is no path.
+        """
+        if self._cache_version != self.grid.version:
+            self._cache.clear()
+            self._cache_version = self.grid.version
+
+        key = (start, goal)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return list(self._cache[key])
+
+        path = self._search(start, goal, max_expansions or self.MAX_EXPANSIONS)
+        if path is not None:
+            self._cache[key] = tuple(path)
+            if len(self._cache) > self.MAX_CACHED_PATHS:
+                self._cache.popitem(last=False)
+        return path
+
+    def _search(self, start, goal, max_expansions):
+        if start == goal:
+            return []
+        if not self.grid.is_walkable(*goal):
+            return None
+
+        width = self.grid.width
+        height = self.grid.height
+        cells = self.grid.cells
+        start_index = start[1] * width + start[0]
+        goal_index = goal[1] * width + goal[0]
+        goal_x, goal_y = goal
+
+        came_from = {start_index: None}
+        cost = {start_index: 0}
+        # Ties on f go to the node with the higher g, which is closer to the goal
+        open_heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start_index)]
+        expansions = 0
+
+        while open_heap:
+            _, negative_g, index = heapq.heappop(open_heap)
+            g = -negative_g
+            if index == goal_index:
+                return self._build_path(came_from, index, width)
+            if g > cost[index]:
+                continue  # Stale heap entry
+            expansions += 1
+            if expansions > max_expansions:
+                return None
+
+            x = index % width
+            y = index // width
+            next_g = g + 1
+            for neighbour_x, neighbour_y, neighbour in ((x - 1, y, index - 1), (x + 1, y, index + 1),
+                                                         (x, y - 1, index - width), (x, y + 1, index + width)):
+                if not (0 <= neighbour_x < width and 0 <= neighbour_y < height) or not cells[neighbour]:
+                    continue
+                if next_g < cost.get(neighbour, next_g + 1):
+                    cost[neighbour] = next_g
+                    came_from[neighbour] = index
+                    estimate = next_g + abs(neighbour_x - goal_x) + abs(neighbour_y - goal_y)
+                    heapq.heappush(open_heap, (estimate, -next_g, neighbour))
+        return None
+
+    @staticmethod
+    def _build_path(came_from, index, width):
+        path = []
+        while came_from[index] is not None:
+            path.append((index % width, index // width))
+            index = came_from[index]
+        path.reverse()
+        return path
+
+    def repair(self, position, path):
+        """
+        Fix a path from position that runs into tiles which are no longer
+        walkable by detouring to the first walkable tile past them. Falls back
+        to a full search if no short detour exists. Returns the new path or None.
+        """
+        if not path:
+            return path
+        blocked = next((i for i, tile in enumerate(path) if not self.grid.is_walkable(*tile)), None)
+        if blocked is None:
+            return path
+
+        rejoin = next((i for i in range(blocked + 1, len(path)) if self.grid.is_walkable(*path[i])), None)
+        if rejoin is not None:
+            resume_from = path[blocked - 1] if blocked > 0 else position
+            detour = self._search(resume_from, path[rejoin], self.REPAIR_EXPANSIONS)
+            if detour is not None:
+                return path[:blocked] + detour + path[rejoin + 1:]
+        return self.find_path(position, path[-1])
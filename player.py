@@ -1,11 +1,28 @@
 import pygame
+from collections import deque
 from tile_types import TileTypes
 from inventory import Inventory
 from skills import Skills
 from items import ItemRegistry
 from map_data import Map
+from game_log import get_logger
+
+log = get_logger("player")
 
 class Player:
+    MOVES = {
+        'left': (-1, 0),
+        'right': (1, 0),
+        'up': (0, -1),
+        'down': (0, 1)
+    }
+    KEY_DIRECTIONS = {
+        pygame.K_LEFT: 'left',
+        pygame.K_RIGHT: 'right',
+        pygame.K_UP: 'up',
+        pygame.K_DOWN: 'down'
+    }
+    
     def __init__(self, tile_size, map_data):
         self.tile_size = tile_size
         self.map_data = map_data
@@ -30,9 +47,14 @@ class Player:
         self.health = 100
         self.skills = Skills()  # Add skills system
         self.direction = 'right'  # Added for direction indicator
-        self.smelting_timer = 0
-        self.smelting_in_progress = False
-        self.smelting_ores = None  # Will store (copper_slot, tin_slot) while smelting
+        self.SMELTING_TIME = 2000  # Milliseconds to smelt one bar
+        self.SMELTING_ORES = ("copper_ore", "tin_ore")
+        self.smelting_jobs = {}  # Furnace position -> scheduled completion event
+        self.WALK_STEP_TIME = 150  # Milliseconds per tile when walking a path
+        self.path = deque()  # Tiles still to walk through for click-to-move
+        self.walk_event = None
+        self.walk_facing = None  # Tile to turn towards once the path is walked
+        self.travel_target = None  # What travel_to is heading for, e.g. "copper"
 
     @property
     def equipped_item(self):
@@ -54,47 +76,138 @@ class Player:
             self.inventory.is_open = False
             
             if event.key == pygame.K_e:
-                # Get tile in front of player
-                target_x, target_y = self.get_facing_tile()
-                target_tile = self.map_data[target_y][target_x]
-                tile_props = TileTypes.get_tile_properties(target_tile)
-                
-                if tile_props.get('craftable', False):
-                    self.try_crafting()
-                elif tile_props.get('smeltable', False):
-                    self.try_smelting()
-                # Check for bed interaction
-                elif tile_props.get('interactable', False) and target_tile == TileTypes.BED:
-                    self.use_bed()
-                # Otherwise, if we have a pickaxe equipped, try mining
-                elif self.equipped_item and self.equipped_item.name == "Pickaxe":
-                    self.use_equipped_item()
+                self.interact()
                 return
             elif event.key == pygame.K_k:
                 self.skills.toggle()
                 return
             
             # Movement handling
-            if event.key == pygame.K_LEFT:
-                self.direction = 'left'
-                if self.can_move(self.grid_x - 1, self.grid_y):
-                    self.grid_x -= 1
-                    self.check_for_items()
-            elif event.key == pygame.K_RIGHT:
-                self.direction = 'right'
-                if self.can_move(self.grid_x + 1, self.grid_y):
-                    self.grid_x += 1
-                    self.check_for_items()
-            elif event.key == pygame.K_UP:
-                self.direction = 'up'
-                if self.can_move(self.grid_x, self.grid_y - 1):
-                    self.grid_y -= 1
-                    self.check_for_items()
-            elif event.key == pygame.K_DOWN:
-                self.direction = 'down'
-                if self.can_move(self.grid_x, self.grid_y + 1):
-                    self.grid_y += 1
-                    self.check_for_items()
+            if event.key in self.KEY_DIRECTIONS:
+                self.stop_walking()
+                self.move(self.KEY_DIRECTIONS[event.key])
+
+    def move(self, direction):
+        """Face a direction and step that way if the tile is walkable"""
+        self.direction = direction
+        dx, dy = self.MOVES[direction]
+        if not self.can_move(self.grid_x + dx, self.grid_y + dy):
+            return False
+        self.grid_x += dx
+        self.grid_y += dy
+        self.check_for_items()
+        self.game.notify('player_moved', self.grid_x, self.grid_y)
+        return True
+
+    def walk_to(self, x, y, face=None):
+        """
+        Plan a path to a tile and start walking it, one step every
+        WALK_STEP_TIME. If face is given, turn towards that tile on arrival.
+        """
+        self.stop_walking()
+        path = self.game.pathfinder.find_path((self.grid_x, self.grid_y), (x, y))
+        if not path:
+            return False
+        self.path = deque(path)
+        self.walk_facing = face
+        self.walk_event = self.game.scheduler.schedule(self.WALK_STEP_TIME, self.walk_step)
+        return True
+
+    def stop_walking(self):
+        if self.walk_event:
+            self.game.scheduler.cancel(self.walk_event)
+            self.walk_event = None
+        self.path.clear()
+        self.walk_facing = None
+        self.travel_target = None
+
+    def face(self, x, y):
+        """Turn towards an adjacent tile"""
+        direction = self.step_direction(x, y)
+        if direction:
+            self.direction = direction
+
+    def travel_to(self, target):
+        """
+        Walk to the nearest target (e.g. TileTypes.FURNACE or "copper") and
+        face it, returning False if none can be reached. Each step goes
+        downhill on the target's distance field, so there's no path to plan
+        however far away it is, and the way adapts as the map changes.
+        """
+        self.stop_walking()
+        if self.game.distance_fields.nearest(target, (self.grid_x, self.grid_y)) is None:
+            return False
+        self.travel_target = target
+        self.travel_step(move=False)
+        return True
+
+    def travel_step(self, move=True):
+        self.walk_event = None
+        position = (self.grid_x, self.grid_y)
+        if move:
+            step = self.game.distance_fields.next_step(self.travel_target, position)
+            if step is None or not self.move(self.step_direction(*step)):
+                # The target's gone or out of reach now
+                self.travel_target = None
+                return
+            position = (self.grid_x, self.grid_y)
+
+        nearest = self.game.distance_fields.nearest(self.travel_target, position)
+        if nearest is None:
+            self.travel_target = None
+        elif nearest[2] == 0:
+            # Standing beside it
+            self.face(*nearest[0])
+            self.travel_target = None
+        else:
+            self.walk_event = self.game.scheduler.schedule(self.WALK_STEP_TIME, self.travel_step)
+
+    def step_direction(self, x, y):
+        """Name of the direction to an adjacent tile, or None if it isn't adjacent"""
+        step = (x - self.grid_x, y - self.grid_y)
+        return next((name for name, delta in self.MOVES.items() if delta == step), None)
+
+    def walk_step(self):
+        self.walk_event = None
+        next_x, next_y = self.path[0]
+        if not self.game.walkability.is_walkable(next_x, next_y):
+            # Something changed in the way, detour around it
+            path = self.game.pathfinder.repair((self.grid_x, self.grid_y), list(self.path))
+            if not path:
+                self.path.clear()
+                return
+            self.path = deque(path)
+            next_x, next_y = self.path[0]
+        
+        direction = self.step_direction(next_x, next_y)
+        if direction is None or not self.move(direction):
+            # We've been moved off the path, plan again from here
+            self.walk_to(*self.path[-1], face=self.walk_facing)
+            return
+        self.path.popleft()
+        
+        if self.path:
+            self.walk_event = self.game.scheduler.schedule(self.WALK_STEP_TIME, self.walk_step)
+        elif self.walk_facing:
+            self.face(*self.walk_facing)
+            self.walk_facing = None
+
+    def interact(self):
+        """Use the tile in front of the player"""
+        target_x, target_y = self.get_facing_tile()
+        target_tile = self.map_data[target_y][target_x]
+        tile_props = TileTypes.get_properties(target_tile)
+        
+        if tile_props.craftable:
+            self.try_crafting()
+        elif tile_props.smeltable:
+            self.try_smelting()
+        # Check for bed interaction
+        elif tile_props.interactable and target_tile == TileTypes.BED:
+            self.use_bed()
+        # Otherwise, if we have a pickaxe equipped, try mining
+        elif self.equipped_item and self.equipped_item.name == "Pickaxe":
+            self.use_equipped_item()
 
     def draw(self, screen):
         # Draw player base
@@ -159,47 +272,24 @@ class Player:
             target_x, target_y = self.get_facing_tile()
             self.equipped_item.use(self, target_x, target_y)
 
-    def update(self):
-        # Add this new method to handle smelting timer
-        current_time = pygame.time.get_ticks()
-        
-        # Check if smelting is done
-        if self.smelting_in_progress and current_time >= self.smelting_timer:
-            self.complete_smelting()
-    
     def try_smelting(self):
         # Get tile in front of player based on direction
         target_x, target_y = self.get_facing_tile()
         target_tile = self.map_data[target_y][target_x]
-        tile_props = TileTypes.get_tile_properties(target_tile)
+        tile_props = TileTypes.get_properties(target_tile)
+        furnace_pos = (target_x, target_y)
         
-        if tile_props.get('smeltable', False) and not self.smelting_in_progress:
-            # Check for required ores
-            copper_ore = None
-            tin_ore = None
-            copper_slot = None
-            tin_slot = None
-            
-            # Find copper and tin ores in inventory
-            for i, item in enumerate(self.inventory.items):
-                if item:
-                    if item.name == "Copper Ore" and not copper_ore:
-                        copper_ore = item
-                        copper_slot = i
-                    elif item.name == "Tin Ore" and not tin_ore:
-                        tin_ore = item
-                        tin_slot = i
-            
+        # Each furnace smelts one bar at a time
+        if tile_props.smeltable and furnace_pos not in self.smelting_jobs:
             # If we have both ores, start smelting
-            if copper_ore and tin_ore:
-                # Remove the ores
-                self.inventory.items[copper_slot] = None
-                self.inventory.items[tin_slot] = None
+            if all(self.inventory.has(ore_type) for ore_type in self.SMELTING_ORES):
+                # Remove one of each ore
+                for ore_type in self.SMELTING_ORES:
+                    self.inventory.take(ore_type)
                 
-                # Start smelting timer (2 seconds = 2000 milliseconds)
-                self.smelting_timer = pygame.time.get_ticks() + 2000
-                self.smelting_in_progress = True
-                self.smelting_ores = (copper_slot, tin_slot)
+                # Finish smelting once the game clock has moved on
+                self.smelting_jobs[furnace_pos] = self.game.scheduler.schedule(
+                    self.SMELTING_TIME, self.complete_smelting, furnace_pos)
                 self.game.add_message("Smelting Bronze Bar...")
             else:
                 self.game.add_message("Need 1 Copper Ore and 1 Tin Ore to smelt Bronze Bar")
@@ -219,47 +309,29 @@ class Player:
         
         return target_x, target_y
 
-    def complete_smelting(self):
-        # Create and add bronze bar
-        bronze_bar = ItemRegistry.create_item("bronze_bar")
-        if self.inventory.add_item(bronze_bar):
+    def complete_smelting(self, furnace_pos):
+        self.smelting_jobs.pop(furnace_pos, None)
+        
+        # Add bronze bar
+        if self.inventory.add_item_type("bronze_bar"):
             self.game.add_message("Successfully smelted a Bronze Bar!")
             # Award smithing XP
             self.skills.add_smithing_xp(20)
             self.game.add_message("20xp gained")
         else:
             self.game.add_message("Inventory full! Cannot smelt Bronze Bar.")
-            # Return the ores to inventory if smelting_ores exists
-            if self.smelting_ores:
-                copper_slot, tin_slot = self.smelting_ores
-                self.inventory.items[copper_slot] = ItemRegistry.create_item("copper_ore")
-                self.inventory.items[tin_slot] = ItemRegistry.create_item("tin_ore")
-        
-        # Reset smelting state
-        self.smelting_in_progress = False
-        self.smelting_ores = None
+            # Return the ores to inventory
+            for ore_type in self.SMELTING_ORES:
+                self.inventory.add_item_type(ore_type)
 
     def can_move(self, x, y):
-        # Check map bounds
-        if x < 0 or x >= len(self.map_data[0]) or y < 0 or y >= len(self.map_data):
-            return False
-        
-        # Get tile properties
-        tile_type = self.map_data[y][x]
-        tile_props = TileTypes.get_tile_properties(tile_type)
-        
-        # Return whether tile is walkable
-        return tile_props.get('walkable', False)
+        # Cached per tile and bounds checked, kept up to date as the map changes
+        return self.game.walkability.is_walkable(x, y)
 
     def check_for_items(self):
         pos = (self.grid_x, self.grid_y)
-        if pos in self.game.ground_items:
-            items = self.game.ground_items[pos]
-            
-            # Convert single item to list if needed (backwards compatibility)
-            if not isinstance(items, list):
-                items = [items]
-            
+        items = self.game.current_map.items_at(*pos)
+        if items:
             # Try to pick up each item in the stack
             items_to_remove = []
             for item in items:
@@ -273,27 +345,24 @@ class Player:
             # Remove picked up items from ground
             if len(items_to_remove) == len(items):
                 # All items picked up, remove the position entirely
-                del self.game.ground_items[pos]
+                self.game.current_map.set_items(pos, None)
             else:
                 # Only some items picked up, update the list
-                self.game.ground_items[pos] = [item for item in items if item not in items_to_remove]
+                self.game.current_map.set_items(pos, [item for item in items if item not in items_to_remove])
 
     def use_bed(self):
         """Called when player interacts with bed"""
-        print("Bed interaction triggered")  # Debug print
+        log.debug("Bed interaction triggered")
         self.game.add_message("Getting sleepy...")
-        self.game.start_sleep_animation()
+        self.game.start_sleep()
 
     def complete_sleep(self):
-        """Called after sleep animation completes"""
-        print("Sleep completion triggered")
+        """Called once the player wakes up"""
+        log.debug("Sleep completion triggered")
         equipped_item = self.equipped_item
         
         # Reset game state
-        self.game.state_manager.reset_state()
-        
-        # Update game's ground items reference
-        self.game.ground_items = self.game.current_map.items
+        self.game.reset_state()
         
         # Restore equipped item
         self.equipped_item = equipped_item
@@ -302,24 +371,16 @@ class Player:
 
     def try_crafting(self):
         # First check if player has a hammer
-        has_hammer = False
-        for item in self.inventory.items:
-            if item and item.name == "Hammer":
-                has_hammer = True
-                break
-        
-        if not has_hammer:
+        if not self.inventory.has("Hammer"):
             self.game.add_message("You need a Hammer to work the metal!")
             return
 
         # Check for metal bars in inventory
         available_bars = {}
-        for i, item in enumerate(self.inventory.items):
-            if item and item.name.endswith("Bar"):
-                material = item.name.split()[0].lower()
-                if material not in available_bars:
-                    available_bars[material] = []
-                available_bars[material].append(i)
+        for item_type, slots in self.inventory.type_slots.items():
+            if item_type and item_type.endswith("_bar"):
+                material = item_type[:-len("_bar")]
+                available_bars[material] = list(slots)
         
         if available_bars:
             self.game.menu_manager.open_menu(self.game.crafting_menu)
@@ -0,0 +1,172 @@
+import atexit
+import json
+import time
+import pygame
+from collections import deque
+from contextlib import contextmanager
+from text_cache import TextCache
+
+class FrameProfiler:
+    """
+    Times named phases of each frame and keeps a rolling history of them.
+    Phases can nest; each phase is charged only for its own time, so a
+    menu drawn inside the GUI phase doesn't count towards the GUI too.
+    Nothing is recorded unless enabled, and the overlay is only drawn while
+    visible.
+    """
+    HISTORY = 300  # Frames kept for averages, percentiles and the graph
+    REFRESH_FRAMES = 30  # Recompute the overlay text this often
+    GRAPH_WIDTH = 300
+    GRAPH_HEIGHT = 60
+    GRAPH_SCALE = 2  # Pixels per millisecond
+    LINE_HEIGHT = 16
+    FRAME_BUDGET = 1000 / 60  # Drawn as a line across the graph
+
+    def __init__(self):
+        self.enabled = False
+        self.visible = False
+        self.frame_times = deque(maxlen=self.HISTORY)  # Milliseconds
+        self.phase_times = {}  # Phase name -> deque of milliseconds per frame
+        self._frame_start = None
+        self._current = {}  # Phase name -> seconds spent this frame
+        self._stack = []  # [name, start] of the phases currently running
+        self._overlay_lines = []  # Rendered text surfaces, one per line
+        self._overlay_background = None
+        self._frames_since_refresh = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.enabled = self.enabled or self.visible
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+            self._current = {}
+
+    def end_frame(self):
+        """Record the frame that's in progress"""
+        if not self.enabled or self._frame_start is None:
+            return
+        self.frame_times.append((time.perf_counter() - self._frame_start) * 1000)
+        for name, times in self.phase_times.items():
+            times.append(self._current.pop(name, 0) * 1000)
+        for name, seconds in self._current.items():
+            # New phase, pad its history so every phase lines up by frame
+            times = deque([0] * (len(self.frame_times) - 1), maxlen=self.HISTORY)
+            times.append(seconds * 1000)
+            self.phase_times[name] = times
+        self._frame_start = None
+        self._frames_since_refresh += 1
+
+    def cancel_frame(self):
+        """Forget the frame in progress, e.g. when nothing ended up being drawn"""
+        self._frame_start = None
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled or self._frame_start is None:
+            yield
+            return
+        now = time.perf_counter()
+        if self._stack:
+            # Pause the enclosing phase
+            parent = self._stack[-1]
+            self._current[parent[0]] = self._current.get(parent[0], 0) + now - parent[1]
+        entry = [name, now]
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            self._current[name] = self._current.get(name, 0) + now - entry[1]
+            if self._stack:
+                self._stack[-1][1] = now
+
+    @contextmanager
+    def paused(self):
+        """Leave time spent in the block, e.g. blocked waiting for input, out of the frame and its phases"""
+        if not self.enabled or self._frame_start is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._frame_start is not None:
+                elapsed = time.perf_counter() - start
+                self._frame_start += elapsed
+                if self._stack:
+                    self._stack[-1][1] += elapsed
+
+    @staticmethod
+    def _summarize(values):
+        ordered = sorted(values)
+        if not ordered:
+            return {'avg': 0, 'p95': 0, 'p99': 0, 'max': 0}
+        return {
+            'avg': sum(ordered) / len(ordered),
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            'max': ordered[-1]
+        }
+
+    def stats(self):
+        """Rolling timings in milliseconds for whole frames and each phase"""
+        return {
+            'frames': len(self.frame_times),
+            'frame': self._summarize(self.frame_times),
+            'phases': {name: self._summarize(times) for name, times in self.phase_times.items()}
+        }
+
+    def dump(self, path):
+        """Write stats() to a JSON file"""
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def dump_at_exit(self, path):
+        """Collect stats from now on and write them to path when the program exits"""
+        self.enabled = True
+        atexit.register(self.dump, path)
+
+    def _refresh_overlay(self):
+        stats = self.stats()
+        frame = stats['frame']
+        lines = [f"frame  avg {frame['avg']:5.2f}  p95 {frame['p95']:5.2f}  p99 {frame['p99']:5.2f} ms"]
+        for name, phase in sorted(stats['phases'].items(), key=lambda item: -item[1]['avg']):
+            lines.append(f"{name:<10} {phase['avg']:5.2f}  {phase['p95']:5.2f}  {phase['p99']:5.2f}")
+        # Render the text once per refresh rather than every frame. Timings
+        # change every refresh, so don't fill the shared text cache with them.
+        font = TextCache.get_font(18)
+        self._overlay_lines = [font.render(line, True, (255, 255, 255)) for line in lines]
+
+        height = len(lines) * self.LINE_HEIGHT + self.GRAPH_HEIGHT + 15
+        if self._overlay_background is None or self._overlay_background.get_height() != height:
+            self._overlay_background = pygame.Surface((self.GRAPH_WIDTH + 10, height))
+            self._overlay_background.set_alpha(200)
+            self._overlay_background.fill((0, 0, 0))
+        self._frames_since_refresh = 0
+
+    def draw(self, screen, x=10, y=10):
+        """Draw the timing table and frame time graph"""
+        if not self.visible:
+            return
+        if not self._overlay_lines or self._frames_since_refresh >= self.REFRESH_FRAMES:
+            self._refresh_overlay()
+
+        screen.blit(self._overlay_background, (x - 5, y - 5))
+        for i, line in enumerate(self._overlay_lines):
+            screen.blit(line, (x, y + i * self.LINE_HEIGHT))
+
+        # One bar per frame, newest on the right
+        graph_top = y + len(self._overlay_lines) * self.LINE_HEIGHT + 5
+        graph_bottom = graph_top + self.GRAPH_HEIGHT
+        frames = list(self.frame_times)[-self.GRAPH_WIDTH:]
+        start_x = x + self.GRAPH_WIDTH - len(frames)
+        for i, frame_time in enumerate(frames):
+            bar_height = min(self.GRAPH_HEIGHT, int(frame_time * self.GRAPH_SCALE))
+            color = (0, 200, 0) if frame_time <= self.FRAME_BUDGET else (220, 60, 60)
+            pygame.draw.line(screen, color, (start_x + i, graph_bottom),
+                             (start_x + i, graph_bottom - bar_height))
+        budget_y = graph_bottom - min(self.GRAPH_HEIGHT, int(self.FRAME_BUDGET * self.GRAPH_SCALE))
+        pygame.draw.line(screen, (255, 255, 0), (x, budget_y), (x + self.GRAPH_WIDTH, budget_y))
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+
+class ScheduledEvent:
+    """Handle returned by Scheduler.schedule, used to cancel the event"""
+    __slots__ = ('due', 'callback', 'args', 'cancelled')
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+class Scheduler:
+    """
+    Runs callbacks at a point in game time. Events are kept in a heap ordered
+    by due time, so scheduling and firing cost O(log n) and nothing is scanned
+    per frame. Time only advances through update() and stands still while
+    paused, so paused periods don't count towards any event.
+    """
+    def __init__(self):
+        self.time = 0  # Scheduler time in milliseconds
+        self.paused = False
+        self._events = []  # Heap of (due, sequence, event)
+        self._sequence = itertools.count()  # Keeps same-time events in order
+        self._last_clock_time = None
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) once delay milliseconds of game time have passed"""
+        event = ScheduledEvent(self.time + delay, callback, args)
+        heapq.heappush(self._events, (event.due, next(self._sequence), event))
+        return event
+
+    def cancel(self, event):
+        """Cancel a scheduled event. It is dropped lazily when it reaches the top of the heap."""
+        event.cancelled = True
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def time_until_next(self):
+        """Milliseconds until the next pending event, or None if nothing is scheduled"""
+        self._drop_cancelled()
+        if not self._events or self.paused:
+            return None
+        return max(0, self._events[0][0] - self.time)
+
+    def _drop_cancelled(self):
+        while self._events and self._events[0][2].cancelled:
+            heapq.heappop(self._events)
+
+    def update(self, clock_time):
+        """Advance to the given clock time (ms) and run every event that is due"""
+        if self._last_clock_time is not None and not self.paused:
+            self.time += clock_time - self._last_clock_time
+        self._last_clock_time = clock_time
+
+        while self._events and self._events[0][0] <= self.time:
+            _, _, event = heapq.heappop(self._events)
+            if not event.cancelled:
+                event.callback(*event.args)
+
+class TimingWheel:
+    """
+    Hashed timing wheel for large numbers of coarse timers, like rock
+    respawns. Timers are dropped into a slot by the tick they're due, and
+    timers further out than one turn of the wheel wait in their slot until
+    the wheel comes round to them on the right turn. A heap holds each
+    distinct due tick once, so the next timer is known without looking
+    through the slots, and advancing jumps straight from one due tick to the
+    next. Timers share ticks, so the heap stays far smaller than the number
+    of timers.
+    """
+    def __init__(self, tick=100, slot_count=512):
+        self.tick = tick  # Milliseconds per slot
+        self.slots = [[] for _ in range(slot_count)]  # Lists of (due tick, callback, args)
+        self.current_tick = 0
+        self.pending = 0
+        self._due_ticks = []  # Heap of ticks with at least one timer due
+        self._due_tick_set = set()  # The same ticks, to push each one only once
+
+    def schedule(self, time, delay, callback, *args):
+        """Call callback(*args) once the wheel has been advanced delay ms past time"""
+        due_tick = max(self.current_tick + 1, -(-(time + delay) // self.tick))
+        self.slots[due_tick % len(self.slots)].append((due_tick, callback, args))
+        self.pending += 1
+        if due_tick not in self._due_tick_set:
+            self._due_tick_set.add(due_tick)
+            heapq.heappush(self._due_ticks, due_tick)
+
+    def time_until_next(self, time):
+        """Milliseconds from time until the next timer fires, or None if there are none"""
+        if not self._due_ticks:
+            return None
+        return max(0, self._due_ticks[0] * self.tick - time)
+
+    def advance(self, time):
+        """Move the wheel up to time (ms), running every timer that has come due"""
+        target_tick = time // self.tick
+        # Callbacks may schedule more timers, which are picked up if they're due too
+        while self._due_ticks and self._due_ticks[0] <= target_tick:
+            tick = heapq.heappop(self._due_ticks)
+            self._due_tick_set.discard(tick)
+            self.current_tick = tick
+            slot = self.slots[tick % len(self.slots)]
+            due = [timer for timer in slot if timer[0] <= tick]
+            slot[:] = [timer for timer in slot if timer[0] > tick]
+            self.pending -= len(due)
+            for _, callback, args in due:
+                callback(*args)
+        self.current_tick = max(self.current_tick, target_tick)
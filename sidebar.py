@@ -1,6 +1,7 @@
 import pygame
 from tile_types import TileTypes, RockTypes
 from items import ItemRegistry
+from text_cache import TextCache
 
 class Sidebar:
     def __init__(self, x, width, height, tile_size):
@@ -129,8 +130,7 @@ class Sidebar:
             pygame.draw.rect(screen, color, button_rect)
             
             # Draw category text
-            font = pygame.font.Font(None, 24)
-            text = font.render(category, True, (255, 255, 255))
+            text = TextCache.render(category, 24)
             text_rect = text.get_rect(center=button_rect.center)
             screen.blit(text, text_rect)
             
@@ -148,7 +148,7 @@ class Sidebar:
             ]
             
             for tile in all_tiles:
-                tile_props = TileTypes.get_tile_properties(tile)
+                tile_props = TileTypes.get_properties(tile)
                 button_rect = pygame.Rect(
                     self.x + 10,
                     current_y,
@@ -165,11 +165,10 @@ class Sidebar:
                     self.tile_size - 10,
                     self.tile_size - 10
                 )
-                pygame.draw.rect(screen, tile_props['color'], preview_rect)
+                pygame.draw.rect(screen, tile_props.color, preview_rect)
                 
                 # Draw tile name
-                font = pygame.font.Font(None, 20)
-                text = font.render(tile_props['name'], True, (255, 255, 255))
+                text = TextCache.render(tile_props.name, 20)
                 text_rect = text.get_rect(midleft=(preview_rect.right + 5, preview_rect.centery))
                 screen.blit(text, text_rect)
                 
@@ -222,8 +221,7 @@ class Sidebar:
         pygame.draw.rect(screen, item.icon_color, preview_rect)
         
         # Draw item name
-        font = pygame.font.Font(None, 20)
-        text = font.render(item_name, True, (255, 255, 255))
+        text = TextCache.render(item_name, 20)
         text_rect = text.get_rect(midleft=(preview_rect.right + 5, preview_rect.centery))
         screen.blit(text, text_rect)
     
@@ -247,7 +245,6 @@ class Sidebar:
         pygame.draw.rect(screen, rock_data['color'], preview_rect)
         
         # Draw rock name and level
-        font = pygame.font.Font(None, 20)
-        text = font.render(f"{rock_data['name']} (Lvl {rock_data['mining_level']})", True, (255, 255, 255))
+        text = TextCache.render(f"{rock_data['name']} (Lvl {rock_data['mining_level']})", 20)
         text_rect = text.get_rect(midleft=(preview_rect.right + 5, preview_rect.centery))
         screen.blit(text, text_rect) 
\ No newline at end of file
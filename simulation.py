@@ -0,0 +1,181 @@
+import itertools
+from map_data import Map
+from game_state import GameState
+from player import Player
+from scheduler import Scheduler, TimingWheel
+from tile_types import TileTypes
+from menu_manager import MenuManager
+from crafting_menu import CraftingMenu
+from pathfinding import WalkabilityGrid, Pathfinder
+from distance_fields import DistanceFields
+
+class ManualClock:
+    """Clock that only moves when advanced, for headless runs"""
+    def __init__(self, start=0):
+        self.time = start  # Milliseconds
+
+    def __call__(self):
+        return self.time
+
+    def advance(self, milliseconds):
+        self.time += milliseconds
+
+class Simulation:
+    """
+    The game rules without a window. Owns the map, player and scheduler and
+    reads time from an injectable clock, a callable returning milliseconds.
+    Anything that presents the game (the pygame window, logs, bots) registers
+    as an observer and receives on_<event> calls such as on_message(text).
+    """
+    RESPAWN_TICK = 100  # Respawn timer resolution in milliseconds
+    DEFAULT_RESPAWN_TIME = 5000  # For rocks without a rock type
+
+    def __init__(self, game_map, clock=None, tile_size=50):
+        self.clock = clock if clock is not None else ManualClock()
+        self.current_map = game_map
+        self.state_manager = GameState(game_map)
+        self.walkability = WalkabilityGrid(game_map)
+        self.pathfinder = Pathfinder(self.walkability)
+        self.distance_fields = DistanceFields(game_map, self.walkability)
+
+        # Timed actions (smelting etc.) run off the simulation clock
+        self.scheduler = Scheduler()
+        self.scheduler.update(self.clock())
+        
+        # Mined rocks grow back one by one. There can be thousands waiting,
+        # so they go on a timing wheel that runs on scheduler time.
+        self.respawns = TimingWheel(self.RESPAWN_TICK)
+        # Each mining gets a fresh token. A respawn timer only acts if its
+        # token is still the current one for the tile, so timers left over
+        # from before a reset or an earlier mining do nothing.
+        self.respawn_tokens = {}  # (x, y) -> token of the timer that should respawn it
+        self._next_respawn_token = itertools.count()
+
+        self.menu_manager = MenuManager()
+        self.crafting_menu = CraftingMenu()
+        self.observers = []
+        self.sleeping = False
+
+        # Create player at spawn point
+        self.player = Player(tile_size, game_map.tiles)
+        self.player.grid_x, self.player.grid_y = game_map.player_spawn
+        self.player.game = self
+
+    @classmethod
+    def from_file(cls, filename, clock=None, **kwargs):
+        return cls(Map.load_from_file(filename), clock, **kwargs)
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def notify(self, event, *args):
+        for observer in self.observers:
+            handler = getattr(observer, f"on_{event}", None)
+            if handler:
+                handler(*args)
+
+    def add_message(self, text):
+        self.notify('message', text)
+
+    def update(self):
+        """Catch the simulation up with the clock, running any due timed actions"""
+        self.scheduler.update(self.clock())
+        self.respawns.advance(self.scheduler.time)
+
+    def time_until_next(self):
+        """Milliseconds until a timed action or respawn is due, or None if nothing is pending"""
+        if self.scheduler.paused:
+            return None
+        timeouts = [timeout for timeout in (self.scheduler.time_until_next(),
+                                            self.respawns.time_until_next(self.scheduler.time))
+                    if timeout is not None]
+        return min(timeouts) if timeouts else None
+
+    def rock_depleted(self, x, y):
+        """Start the respawn timer for a rock that was just mined"""
+        rock_type = self.current_map.rock_type_at(x, y)
+        delay = rock_type.get('respawn_time', self.DEFAULT_RESPAWN_TIME) if rock_type else self.DEFAULT_RESPAWN_TIME
+        token = next(self._next_respawn_token)
+        self.respawn_tokens[(x, y)] = token
+        self.respawns.schedule(self.scheduler.time, delay, self.respawn_rock, x, y, token)
+
+    def respawn_rock(self, x, y, token):
+        if self.respawn_tokens.get((x, y)) != token:
+            return  # Superseded by a reset or a later mining
+        del self.respawn_tokens[(x, y)]
+        if self.current_map.tiles[y, x] == TileTypes.DEPLETED_ROCK:
+            self.current_map.set_tile(x, y, TileTypes.ROCK)
+
+    def reset_state(self):
+        """Put the map back to its initial state, forgetting respawns it made pointless"""
+        self.state_manager.reset_state()
+        self.respawn_tokens.clear()
+
+    def advance(self, milliseconds):
+        """Move a ManualClock forward and update"""
+        self.clock.advance(milliseconds)
+        self.update()
+
+    # Player actions
+    def move(self, direction):
+        self.player.stop_walking()
+        return self.player.move(direction)
+
+    def walk_to(self, x, y):
+        """Walk the player to a tile over the following ticks, returning False if it can't be reached"""
+        return self.player.walk_to(x, y)
+
+    def interact(self):
+        """Use whatever the player is facing, like pressing E"""
+        self.player.interact()
+
+    def mine(self, x, y):
+        if self.player.equipped_item:
+            self.player.equipped_item.use(self.player, x, y)
+
+    def nearest(self, target):
+        """
+        The closest reachable target to the player, e.g. TileTypes.FURNACE or
+        "copper", as (target position, standing position, distance) or None
+        """
+        return self.distance_fields.nearest(target, (self.player.grid_x, self.player.grid_y))
+
+    def travel_to(self, target):
+        """Walk to the nearest target and face it, returning False if none can be reached"""
+        return self.player.travel_to(target)
+
+    def smelt(self):
+        self.player.try_smelting()
+
+    def craft(self, recipe_name):
+        """Craft a recipe by name, e.g. "Bronze Dagger", if the player's level allows it"""
+        for recipes in self.crafting_menu.recipes.values():
+            for recipe in recipes:
+                if recipe.name == recipe_name:
+                    if self.player.skills.smithing_level < recipe.level:
+                        return False
+                    self.crafting_menu.craft_item(recipe, self.player)
+                    return True
+        raise ValueError(f"Unknown recipe: {recipe_name}")
+
+    def sleep(self):
+        """Use the bed and wake up straight away"""
+        self.player.use_bed()
+        self.wake()
+
+    def start_sleep(self):
+        self.sleeping = True
+        self.scheduler.pause()  # Timed actions wait until the player wakes up
+        self.notify('sleep_started')
+
+    def wake(self):
+        if not self.sleeping:
+            return
+        self.sleeping = False
+        self.scheduler.resume()
+        self.player.complete_sleep()
+        self.notify('woke_up')
@@ -1,4 +1,8 @@
 import pygame
+from text_cache import TextCache
+from game_log import get_logger
+
+log = get_logger("skills")
 
 class Skills:
     def __init__(self):
@@ -16,7 +20,7 @@ class Skills:
     
     def toggle(self):
         self.is_open = not self.is_open
-        print(f"Skills menu {'opened' if self.is_open else 'closed'}")
+        log.debug("Skills menu %s", 'opened' if self.is_open else 'closed')
     
     def add_mining_xp(self, xp):
         self.mining_xp += xp
@@ -31,7 +35,7 @@ class Skills:
         while (self.mining_level - 1) < len(self.xp_requirements) and \
               self.mining_xp >= self.xp_requirements[self.mining_level - 1]:
             self.mining_level += 1
-            print(f"Mining level up! Now level {self.mining_level}")
+            log.info("Mining level up, now level %d", self.mining_level)
     
     def check_smithing_level_up(self):
         next_level = self.smithing_level + 1
@@ -39,7 +43,7 @@ class Skills:
         
         if self.smithing_xp >= xp_needed:
             self.smithing_level += 1
-            print(f"Smithing level up! Now level {self.smithing_level}")
+            log.info("Smithing level up, now level %d", self.smithing_level)
     
     def draw(self, screen):
         if not self.is_open:
@@ -60,9 +64,8 @@ class Skills:
         pygame.draw.rect(screen, (100, 100, 100), (x, y, width, height))
         
         # Draw mining skill info
-        font = pygame.font.Font(None, 36)
         mining_text = f"Mining: {self.mining_level}"
-        text_surface = font.render(mining_text, True, (255, 255, 255))
+        text_surface = TextCache.render(mining_text, 36)
         screen.blit(text_surface, (x + padding, y + padding))
         
         # Draw XP bar
@@ -84,7 +87,7 @@ class Skills:
         
         # Draw smithing skill info
         smithing_text = f"Smithing: {self.smithing_level}"
-        text_surface = font.render(smithing_text, True, (255, 255, 255))
+        text_surface = TextCache.render(smithing_text, 36)
         screen.blit(text_surface, (x + padding, y + padding + 50))
         
         # Draw smithing XP bar
@@ -0,0 +1,40 @@
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    """
+    Shared text rendering. Fonts are loaded once per size and rendered strings
+    are kept in an LRU cache keyed by (text, size, color), so GUI text that
+    doesn't change between frames is only rasterized once.
+    """
+    MAX_SURFACES = 512
+
+    _fonts = {}  # size -> Font
+    _surfaces = OrderedDict()  # (text, size, color) -> Surface, oldest first
+
+    @classmethod
+    def get_font(cls, size):
+        """Return the default font at a size, loading it on first use"""
+        font = cls._fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            cls._fonts[size] = font
+        return font
+
+    @classmethod
+    def render(cls, text, size, color=(255, 255, 255)):
+        """Return an antialiased surface for text, reusing a cached one if possible"""
+        key = (text, size, color)
+        surface = cls._surfaces.get(key)
+        if surface is None:
+            surface = cls.get_font(size).render(text, True, color)
+            cls._surfaces[key] = surface
+            if len(cls._surfaces) > cls.MAX_SURFACES:
+                cls._surfaces.popitem(last=False)
+        else:
+            cls._surfaces.move_to_end(key)
+        return surface
+
+    @classmethod
+    def clear(cls):
+        cls._surfaces.clear()
@@ -1,4 +1,15 @@
 import pygame
+import numpy as np
+from collections import namedtuple
+from game_log import get_logger
+
+log = get_logger("tiles")
+
+# Immutable properties shared by every tile of a given type
+TileProperties = namedtuple('TileProperties', [
+    'name', 'color', 'walkable', 'mineable', 'resettable',
+    'has_image', 'smeltable', 'interactable', 'craftable'
+], defaults=(False, False, False, False, False, False, False))
 
 class RockTypes:
     COPPER = {
@@ -6,7 +17,8 @@ class RockTypes:
         'color': (184, 115, 51),  # Copper brown
         'mining_level': 1,
         'mining_xp': 10,
-        'ore_type': 'copper'
+        'ore_type': 'copper',
+        'respawn_time': 5000  # Milliseconds until a mined rock grows back
     }
     
     TIN = {
@@ -14,7 +26,8 @@ class RockTypes:
         'color': (211, 212, 213),  # Silvery gray
         'mining_level': 1,
         'mining_xp': 10,
-        'ore_type': 'tin'
+        'ore_type': 'tin',
+        'respawn_time': 5000
     }
     
     IRON = {
@@ -22,7 +35,8 @@ class RockTypes:
         'color': (139, 0, 0),  # Maroon red
         'mining_level': 15,
         'mining_xp': 35,
-        'ore_type': 'iron'
+        'ore_type': 'iron',
+        'respawn_time': 10000
     }
     
     SILVER = {
@@ -30,7 +44,8 @@ class RockTypes:
         'color': (192, 192, 192),  # Silver
         'mining_level': 20,
         'mining_xp': 40,
-        'ore_type': 'silver'
+        'ore_type': 'silver',
+        'respawn_time': 20000
     }
     
     COAL = {
@@ -38,7 +53,8 @@ class RockTypes:
         'color': (64, 64, 64),  # Brown gray
         'mining_level': 30,
         'mining_xp': 50,
-        'ore_type': 'coal'
+        'ore_type': 'coal',
+        'respawn_time': 30000
     }
     
     GOLD = {
@@ -46,7 +62,8 @@ class RockTypes:
         'color': (255, 215, 0),  # Gold
         'mining_level': 40,
         'mining_xp': 65,
-        'ore_type': 'gold'
+        'ore_type': 'gold',
+        'respawn_time': 40000
     }
     
     MITHRIL = {
@@ -54,7 +71,8 @@ class RockTypes:
         'color': (0, 0, 139),  # Dark blue
         'mining_level': 50,
         'mining_xp': 80,
-        'ore_type': 'mithril'
+        'ore_type': 'mithril',
+        'respawn_time': 60000
     }
     
     ADAMANT = {
@@ -62,7 +80,8 @@ class RockTypes:
         'color': (0, 100, 0),  # Dark green
         'mining_level': 60,
         'mining_xp': 95,
-        'ore_type': 'adamant'
+        'ore_type': 'adamant',
+        'respawn_time': 90000
     }
     
     RUNE = {
@@ -70,13 +89,31 @@ class RockTypes:
         'color': (0, 139, 139),  # Dark cyan
         'mining_level': 70,
         'mining_xp': 125,
-        'ore_type': 'rune'
+        'ore_type': 'rune',
+        'respawn_time': 180000
     }
     
     @classmethod
     def get_all_rocks(cls):
         return {name: value for name, value in vars(cls).items() 
                 if not name.startswith('_') and isinstance(value, dict)}
+    
+    @classmethod
+    def by_id(cls, rock_id):
+        """The rock type for an id from a map rock plane, None for 0 (no rock)"""
+        return ROCK_TYPE_TABLE[rock_id] if 0 < rock_id < len(ROCK_TYPE_TABLE) else None
+    
+    @classmethod
+    def id_of(cls, rock_type):
+        """The rock plane id for a rock type (or a copy of one, e.g. from a map file)"""
+        if rock_type is None:
+            return 0
+        return ROCK_TYPE_IDS.get(rock_type['name'], 0)
+
+# Rock types in a fixed order so maps can store one small id per tile.
+# Id 0 means no rock.
+ROCK_TYPE_TABLE = (None,) + tuple(RockTypes.get_all_rocks().values())
+ROCK_TYPE_IDS = {rock_type['name']: rock_id for rock_id, rock_type in enumerate(ROCK_TYPE_TABLE) if rock_type}
 
 class TileTypes:
     # Tile type definitions
@@ -88,109 +125,118 @@ class TileTypes:
     BED = 5  # New bed tile
     ANVIL = 6  # New anvil tile type
     
-    # Dictionary to store rock data for each tile position
-    rock_data = {}  # Format: {(x, y): RockType}
+    # Property table indexed by tile type
+    PROPERTIES = (
+        TileProperties(  # FLOOR
+            name='Floor',
+            color=(100, 100, 100),
+            walkable=True,
+            resettable=False  # Floor doesn't reset
+        ),
+        TileProperties(  # WALL
+            name='Wall',
+            color=(50, 50, 50),
+            mineable=True,
+            resettable=False,  # Walls stay mined
+            has_image=True  # Wall has an image
+        ),
+        TileProperties(  # ROCK
+            name='Rock',
+            color=(128, 128, 128),  # Default gray
+            mineable=True,
+            resettable=True  # Rocks reset when sleeping
+        ),
+        TileProperties(  # DEPLETED_ROCK
+            name='Depleted Rock',
+            color=(70, 70, 70),  # Darker gray
+            resettable=True  # Depleted rocks can reset
+        ),
+        TileProperties(  # FURNACE
+            name='Furnace',
+            color=(200, 60, 20),  # Orange-red for furnace
+            smeltable=True,
+            resettable=False  # Furnaces don't reset
+        ),
+        TileProperties(  # BED
+            name='Bed',
+            color=(150, 50, 150),  # Purple color for bed
+            interactable=True,
+            resettable=False  # Beds don't reset
+        ),
+        TileProperties(  # ANVIL
+            name='Anvil',
+            color=(120, 120, 120),  # Gray color for anvil
+            resettable=False,
+            craftable=True
+        ),
+    )
     
     # Dictionary to store tile images
     tile_images = {}
     
     @classmethod
     def load_images(cls, tile_size):
-        """Load and scale tile images"""
-        cls.tile_images = {
-            cls.WALL: pygame.transform.scale(
-                pygame.image.load('assets/wall.webp').convert_alpha(),
-                (tile_size, tile_size)
-            )
-        }
+        """Load and scale tile images. Tiles whose image can't be loaded are drawn in their colour."""
+        cls.tile_images = {}
+        for tile, path in ((cls.WALL, 'assets/wall.webp'),):
+            try:
+                image = pygame.image.load(path).convert_alpha()
+            except (FileNotFoundError, pygame.error) as error:
+                log.warning("Can't load %s, drawing %s tiles as colour: %s",
+                            path, cls.get_properties(tile).name, error)
+                continue
+            cls.tile_images[tile] = pygame.transform.scale(image, (tile_size, tile_size))
     
     @staticmethod
-    def get_tile_properties(tile_type, position=None):
+    def get_properties(tile_type):
         """
-        Returns a dictionary of properties for each tile type
+        Returns the shared TileProperties record for a tile type.
+        Unknown tile types fall back to floor.
         """
-        base_properties = {
-            TileTypes.FLOOR: {
-                'name': 'Floor',
-                'color': (100, 100, 100),
-                'walkable': True,
-                'mineable': False,
-                'resettable': False  # Floor doesn't reset
-            },
-            TileTypes.WALL: {
-                'name': 'Wall',
-                'color': (50, 50, 50),
-                'walkable': False,
-                'mineable': True,
-                'resettable': False,  # Walls stay mined
-                'has_image': True  # New property to indicate image availability
-            },
-            TileTypes.ROCK: {
-                'name': 'Rock',
-                'color': (128, 128, 128),  # Default gray
-                'walkable': False,
-                'mineable': True,
-                'resettable': True  # Rocks reset when sleeping
-            },
-            TileTypes.DEPLETED_ROCK: {
-                'name': 'Depleted Rock',
-                'color': (70, 70, 70),  # Darker gray
-                'walkable': False,
-                'mineable': False,
-                'resettable': True  # Depleted rocks can reset
-            },
-            TileTypes.FURNACE: {
-                'name': 'Furnace',
-                'color': (200, 60, 20),  # Orange-red for furnace
-                'walkable': False,
-                'mineable': False,
-                'smeltable': True,
-                'resettable': False  # Furnaces don't reset
-            },
-            TileTypes.BED: {
-                'name': 'Bed',
-                'color': (150, 50, 150),  # Purple color for bed
-                'walkable': False,
-                'mineable': False,
-                'interactable': True,
-                'resettable': False  # Beds don't reset
-            },
-            TileTypes.ANVIL: {
-                'name': 'Anvil',
-                'color': (120, 120, 120),  # Gray color for anvil
-                'walkable': False,
-                'mineable': False,
-                'resettable': False,
-                'craftable': True  # Add this property
-            }
-        }
-        
-        properties = base_properties.get(tile_type, base_properties[TileTypes.FLOOR]).copy()
+        try:
+            return TileTypes.PROPERTIES[tile_type]
+        except (IndexError, TypeError):
+            return TileTypes.PROPERTIES[TileTypes.FLOOR]
+
+    @staticmethod
+    def lookup_table(field):
+        """
+        Returns a numpy array holding one property for every possible uint8
+        tile value, so whole tile grids can be checked with a single index.
+        """
+        return np.array([getattr(TileTypes.get_properties(tile), field) for tile in range(256)])
+
+    @staticmethod
+    def get_tile_color(tile_type, rock_type=None):
+        """Returns the draw colour of a tile, using the rock type's colour for rocks"""
+        if tile_type == TileTypes.ROCK and rock_type:
+            return rock_type['color']
+        return TileTypes.get_properties(tile_type).color
+
+    @staticmethod
+    def get_tile_properties(tile_type, position=None, game_map=None, rock_type=None):
+        """
+        Returns a dictionary of properties for each tile type.
+        Kept for compatibility - prefer get_properties() and Map.rock_type_at().
+        Rock types now live on the map, so an (x, y) position needs the
+        game_map to look it up in. Callers that already have the rock type
+        can pass it as rock_type instead.
+        """
+        properties = TileTypes.get_properties(tile_type)._asdict()
         
         # Add rock-specific properties if applicable
-        if tile_type == TileTypes.ROCK and position:
-            # Convert position to string format to match rock_data keys
-            pos_str = str(position)
-            if pos_str in TileTypes.rock_data:
-                rock_type = TileTypes.rock_data[pos_str]
-                properties.update(rock_type)
+        if tile_type == TileTypes.ROCK and position and rock_type is None:
+            if game_map is None:
+                raise TypeError("get_tile_properties needs game_map to look up the rock type at a position")
+            rock_type = game_map.rock_type_at(*position)
+        if tile_type == TileTypes.ROCK and rock_type:
+            properties.update(rock_type)
         
         return properties
 
-    @staticmethod
-    def set_rock_type(x, y, rock_type):
-        """Set the rock type for a specific position"""
-        TileTypes.rock_data[(x, y)] = rock_type
-    
-    @staticmethod
-    def clear_rock_type(x, y):
-        """Clear rock data when rock is mined"""
-        TileTypes.rock_data.pop((x, y), None)
-
     @staticmethod
     def is_walkable(tile_type):
         """
         Quick helper method to check if a tile type can be walked on
         """
-        properties = TileTypes.get_tile_properties(tile_type)
-        return properties['walkable'] if properties else False
\ No newline at end of file
+        return TileTypes.get_properties(tile_type).walkable
\ No newline at end of file